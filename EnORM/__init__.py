@@ -1,14 +1,17 @@
 from .backends import Binary, Boolean, Date, DateTime, Float, Integer, Numeric, Serial, String, Time
 from .column import Column
-from .db_engine import DBEngine
-from .db_session import DBSession
+from .db_engine import AsyncDBEngine, DBEngine, RoutingDBEngine
+from .db_session import AsyncDBSession, DBSession, ScopedSession
 from .fkey import CASCADE, ForeignKey
 from .model import Model
+from .sharding import ShardedDBEngine, ShardedDBSession
 
 __version__ = "1.2.2"
 
 __all__ = [
     "CASCADE",
+    "AsyncDBEngine",
+    "AsyncDBSession",
     "Binary",
     "Boolean",
     "Column",
@@ -21,7 +24,11 @@ __all__ = [
     "Float",
     "Integer",
     "Numeric",
+    "RoutingDBEngine",
+    "ScopedSession",
     "Serial",
+    "ShardedDBEngine",
+    "ShardedDBSession",
     "String",
     "Time",
     "__version__",
@@ -0,0 +1,140 @@
+"""Contains helpers for bulk loads, such as the encoder and stream of PostgreSQL `COPY` payloads."""
+
+from __future__ import annotations
+
+import json
+from datetime import timedelta
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple, Type, Union
+
+from .model import Model
+
+Row = Union[Model, Dict[str, Any], Iterable[Any]]
+
+NULL = "\\N"
+ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def row_values(row: Row, columns: List[str]) -> Tuple[Any, ...]:
+    """Values of the given columns in a model object, a dict keyed by column name, or a sequence of values."""
+    if isinstance(row, Model):
+        return tuple(getattr(row, col) for col in columns)
+
+    if isinstance(row, dict):
+        return tuple(row.get(col) for col in columns)
+
+    return tuple(row)
+
+
+class CopyTextEncoder:
+    """Encodes rows of a model into the text format of PostgreSQL's `COPY ... FROM STDIN`.
+
+    Values are converted according to the type of the :class:`.column.Column` they belong to.
+
+    :param model:   the `MappedClass` the rows belong to
+    :param columns: names of the columns, in the order the values are sent.
+    """
+
+    def __init__(self, model: Type, columns: List[str]) -> None:
+        fields = model.get_fields()
+        self.columns = columns
+        self.converters: List[Callable[[Any], str]] = [
+            self.converters_by_type.get(fields[col].type.__name__, str) for col in columns
+        ]
+
+    @property
+    def converters_by_type(self) -> Dict[str, Callable[[Any], str]]:
+        return {
+            "Boolean": lambda val: "t" if val else "f",
+            "Float": repr,
+            "Binary": lambda val: "\\x%s" % bytes(val).hex(),
+            "Date": lambda val: val.isoformat(),
+            "Time": lambda val: val.isoformat(),
+            "DateTime": lambda val: val.isoformat(),
+            "Interval": self.interval,
+            "Geometry": lambda val: val.wkb_hex,
+            "ARRAY": self.array,
+            "JSONB": lambda val: val if isinstance(val, str) else json.dumps(val),
+            "HSTORE": self.hstore,
+        }
+
+    def encode_row(self, row: Row) -> str:
+        """Encodes a model object, a dict keyed by column name, or a sequence of values into a line of text."""
+        return "%s\n" % "\t".join(
+            NULL if val is None else convert(val).translate(ESCAPES)
+            for convert, val in zip(self.converters, row_values(row, self.columns))
+        )
+
+    def encode(self, rows: Iterable[Row], chunk_bytes: int) -> Iterator[bytes]:
+        """Lazily encodes rows into chunks of about `chunk_bytes` bytes, never splitting a row."""
+        lines: List[str] = []
+        size = 0
+        for row in rows:
+            line = self.encode_row(row)
+            lines.append(line)
+            size += len(line)
+            if size >= chunk_bytes:
+                yield "".join(lines).encode()
+                lines, size = [], 0
+
+        if lines:
+            yield "".join(lines).encode()
+
+    @staticmethod
+    def interval(val: timedelta) -> str:
+        return "%r seconds" % val.total_seconds()
+
+    @staticmethod
+    def quote(val: Any) -> str:
+        if val is None:
+            return "NULL"
+
+        return '"%s"' % str(val).replace("\\", "\\\\").replace('"', '\\"')
+
+    @classmethod
+    def array(cls, val: List[Any]) -> str:
+        return "{%s}" % ",".join(cls.array(itm) if isinstance(itm, list) else cls.quote(itm) for itm in val)
+
+    @classmethod
+    def hstore(cls, val: Dict[str, Any]) -> str:
+        return ", ".join("%s=>%s" % (cls.quote(key), cls.quote(itm)) for key, itm in val.items())
+
+
+class CopyStream:
+    """Read-only file-like object over an iterator of byte chunks, as consumed by `copy_expert` of psycopg cursors.
+
+    Holds at most one chunk in memory at a time.
+
+    :param chunks:  iterator of the byte chunks to stream.
+    """
+
+    def __init__(self, chunks: Iterator[bytes]) -> None:
+        self.chunks = chunks
+        self.buffer = b""
+
+    def read(self, size: int = -1) -> bytes:
+        """Reads up to `size` bytes, or the whole rest of the stream if `size` is negative."""
+        while size < 0 or len(self.buffer) < size:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                break
+            self.buffer += chunk
+
+        if size < 0:
+            data, self.buffer = self.buffer, b""
+        else:
+            data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+    def readline(self, size: int = -1) -> bytes:
+        """Reads one row, for drivers that consume the stream line by line."""
+        while b"\n" not in self.buffer:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                break
+            self.buffer += chunk
+
+        stop = self.buffer.find(b"\n") + 1 or len(self.buffer)
+        if 0 <= size < stop:
+            stop = size
+        data, self.buffer = self.buffer[:stop], self.buffer[stop:]
+        return data
@@ -6,14 +6,15 @@ from typing import Any, Dict, Iterable, List, Optional, Type
 
 from .backends import Binary, Serial, String
 from .exceptions import IncompatibleArgument, OrphanColumn
+from .expression import Expression, params_of, tables_of
 from .fkey import ForeignKey
 
 
 class ComparisonMixin:
     """Mixin providing SQL comparison and query operations."""
 
-    def binary_ops(self, other: Any, operator: str) -> str:
-        """String representation for direct Python binary operations between :class:`column.BaseField` objects.
+    def binary_ops(self, other: Any, operator: str) -> Expression:
+        """Expression for direct Python binary operations between :class:`column.BaseField` objects.
 
         E.g.::
 
@@ -24,45 +25,65 @@ class ComparisonMixin:
             u = User(fullname="Abigail Smith", age=30)
             User.age > u.age
 
+        Literals are bound as parameters, i.e. replaced by a `?` placeholder in the SQL text and carried in the `params`
+        of the expression, whereas fields are compared by name.
+
         Has the following:
 
         :param other:       a literal or a :class:`column.BaseField` object, to compare with this object
         :param operator:    SQL operator, represented as a string.
         """
-        other_compound = (
-            "%s.%s" % (other.view_name, other.variable_name) if hasattr(other, "compound_variable_name") else other
-        )
-        full_field_name = ".".join(self.compound_variable_name.split(", "))
-        return "%s %s %s" % (full_field_name, operator, other_compound)
+        if isinstance(other, BaseField):
+            return Expression("%s %s %s" % (self.full_field_name, operator, other.full_field_name))
+
+        return Expression("%s %s ?" % (self.full_field_name, operator), (other,))
+
+    def collection_ops(self, collection: Any, operator: str) -> Expression:
+        """Expression for SQL membership operations, against either a :class:`.subquery.Subquery` object or an iterable
+        of literals, each bound as a parameter.
+        """
+        if hasattr(collection, "inner_sql"):
+            return Expression(
+                "%s %s (%s)" % (self.full_field_name, operator, collection.inner_sql),
+                params_of(collection),
+                tables_of(collection),
+            )
+
+        values = list(collection)
+        placeholders = ", ".join("?" for _ in values)
+        return Expression("%s %s (%s)" % (self.full_field_name, operator, placeholders), values)
+
+    @property
+    def full_field_name(self) -> str:
+        """Name with which the field is referred to in SQL expressions."""
+        return ".".join(self.compound_variable_name.split(", "))
 
-    def __eq__(self, other: Any) -> str:
+    def __eq__(self, other: Any) -> Expression:
         return self.binary_ops(other, "=")
 
-    def __ne__(self, other: Any) -> str:
+    def __ne__(self, other: Any) -> Expression:
         return self.binary_ops(other, "<>")
 
-    def __lt__(self, other: Any) -> str:
+    def __lt__(self, other: Any) -> Expression:
         return self.binary_ops(other, "<")
 
-    def __gt__(self, other: Any) -> str:
+    def __gt__(self, other: Any) -> Expression:
         return self.binary_ops(other, ">")
 
-    def __le__(self, other: Any) -> str:
+    def __le__(self, other: Any) -> Expression:
         return self.binary_ops(other, "<=")
 
-    def __ge__(self, other: Any) -> str:
+    def __ge__(self, other: Any) -> Expression:
         return self.binary_ops(other, ">=")
 
-    def like(self, other: str) -> str:
+    def like(self, other: str) -> Expression:
         return self.binary_ops(other, "LIKE")
 
-    def in_(self, flat_list: Iterable[Any]) -> str:
-        flat_list_str = "(%s)" % flat_list
-        return self.binary_ops(flat_list_str, "IN")
+    def in_(self, flat_list: Iterable[Any]) -> Expression:
+        return self.collection_ops(flat_list, "IN")
 
-    def not_in(self, flat_list: Iterable[Any]) -> str:
-        flat_list_str = "(%s)" % flat_list
-        return self.binary_ops(flat_list_str, "NOT IN")
+    def not_in(self, flat_list: Iterable[Any]) -> Expression:
+        return self.collection_ops(flat_list, "NOT IN")
 
 
 class AliasingMixin:
@@ -69,3 +69,40 @@ TYPES = {
         "Interval": "INTERVAL",
     },
 }
+
+PING_SQLS = {
+    "oracle": "SELECT 1 FROM DUAL",
+}
+
+FAST_EXECUTEMANY_DIALECTS = ("sql_server",)
+
+# Max number of bind parameters per statement. Dialects missing here have no multi-row `VALUES` clause.
+BIND_PARAM_LIMITS = {
+    "sql_server": 2100,
+    "sqlite": 999,
+    "postgresql": 32767,
+    "mysql": 65535,
+}
+
+# Max number of values in an `IN (...)` list, for dialects that cap it regardless of the bind parameters.
+IN_LIST_LIMITS = {
+    "oracle": 1000,
+}
+
+# Max number of rows in a single `VALUES` clause, for dialects that cap it on top of the bind parameters.
+VALUES_ROW_LIMITS = {
+    "sql_server": 1000,
+}
+
+# Typecodes of the `array.array` buffers that columns of these types are fetched into by `Query.to_columns`.
+ARRAY_TYPECODES = {
+    "Integer": "q",
+    "Serial": "q",
+    "Float": "d",
+}
+
+# Templates wrapping a subquery into an `EXISTS` probe, for dialects that cannot select a bare `EXISTS (...)`.
+EXISTS_SQLS = {
+    "sql_server": "SELECT CASE WHEN EXISTS (%s) THEN 1 ELSE 0 END",
+    "oracle": "SELECT CASE WHEN EXISTS (%s) THEN 1 ELSE 0 END FROM DUAL",
+}
@@ -80,3 +80,11 @@ class OrphanColumn(Fixed):
     """Raised when a column is instantiated outside a model definition."""
 
     message = "Cannot initialize `Column` outside a `Model`."
+
+
+class PoolExhausted(Fixed):
+    """Raised when no connection could be checked out of a connection pool in time."""
+
+    def __init__(self, max_size: int, waited: float) -> None:
+        self.message = "Connection pool of %d connections exhausted after waiting %.2f seconds." % (max_size, waited)
+        super().__init__()
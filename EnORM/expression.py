@@ -0,0 +1,63 @@
+"""Contains :class:`.expression.Expression`, the SQL fragment produced by comparisons of fields."""
+
+from __future__ import annotations
+
+from typing import Any, FrozenSet, Iterable, Tuple
+
+
+class Expression(str):
+    """SQL fragment with `?` placeholders in place of the literal values it holds, which are carried separately.
+
+    Being a string itself, an expression goes wherever SQL text does, while the values are bound by the driver when the
+    statement is run. Statements therefore read the same whatever the values, and the database can reuse their plans.
+
+    Never directly instantiated, but rather produced by comparing fields, e.g.::
+
+        expr = User.age > 30
+
+        str(expr) == "users.age > ?"
+        expr.params == (30,)
+
+    :param sql:     SQL text of the fragment
+    :param params:  values bound to the placeholders of the fragment, in order. Optional
+    :param tables:  names of the tables read by the subqueries of the fragment. Optional.
+    """
+
+    params: Tuple[Any, ...]
+    tables: FrozenSet[str]
+
+    def __new__(cls, sql: str, params: Iterable[Any] = (), tables: Iterable[str] = ()) -> Expression:
+        expr = super().__new__(cls, sql)
+        expr.params = tuple(params)
+        expr.tables = frozenset(tables)
+        return expr
+
+
+def params_of(sql: Any) -> Tuple[Any, ...]:
+    """Values bound to the placeholders of an SQL fragment, if it is an :class:`.expression.Expression`."""
+    return getattr(sql, "params", ())
+
+
+def tables_of(sql: Any) -> FrozenSet[str]:
+    """Names of the tables read by the subqueries of an SQL fragment, if it is an :class:`.expression.Expression`."""
+    return getattr(sql, "tables", frozenset())
+
+
+def and_(*exprs: Any) -> Expression:
+    """Conjunction of SQL expressions, parenthesized, carrying the params of all of them."""
+    return conjoin("AND", exprs)
+
+
+def or_(*exprs: Any) -> Expression:
+    """Disjunction of SQL expressions, parenthesized, carrying the params of all of them."""
+    return conjoin("OR", exprs)
+
+
+def conjoin(operator: str, exprs: Iterable[Any]) -> Expression:
+    """Joins SQL expressions with a logical operator."""
+    items = list(exprs)
+    return Expression(
+        "(%s)" % (" %s " % operator).join(items),
+        [param for expr in items for param in params_of(expr)],
+        frozenset().union(*map(tables_of, items)),
+    )
@@ -0,0 +1,54 @@
+"""Contains the eager loaders of reverse relations, passed to :meth:`.query.Query.options`, and their helpers."""
+
+from __future__ import annotations
+
+from typing import Any, Iterator, List
+
+from .constants import BIND_PARAM_LIMITS, IN_LIST_LIMITS
+
+
+class Loader:
+    """Strategy to load a reverse relation of all the records a query fetches at once, rather than with a query per
+    record when the relation is accessed.
+
+    Never directly instantiated, but rather by :func:`.loading.selectin` or :func:`.loading.joined`.
+
+    :param name:        reverse name of the relation, as declared by the `ForeignKey` of the related model
+    :param strategy:    either "selectin" or "joined".
+    """
+
+    strategies = ("selectin", "joined")
+
+    def __init__(self, name: str, strategy: str) -> None:
+        if strategy not in self.strategies:
+            raise ValueError("Loading strategy should be one of %s." % ", ".join(self.strategies))
+
+        self.name = name
+        self.strategy = strategy
+
+
+def selectin(name: str) -> Loader:
+    """Loads a reverse relation by the primary keys of the fetched records, with `IN (...)` queries chunked to the
+    limits of the dialect.
+    """
+    return Loader(name, "selectin")
+
+
+def joined(name: str) -> Loader:
+    """Loads a reverse relation with a single query, joining the related model to the distinct keys of the query
+    that fetched the records. Queries bounded by `LIMIT` load by the keys of the records instead, as in
+    :func:`.loading.selectin`.
+    """
+    return Loader(name, "joined")
+
+
+def in_chunk_size(dialect: str, reserved: int = 0) -> int:
+    """Max number of values in an `IN (...)` list of a statement that binds `reserved` other parameters."""
+    return max(IN_LIST_LIMITS.get(dialect, BIND_PARAM_LIMITS.get(dialect, 1000)) - reserved, 1)
+
+
+def in_chunks(values: List[Any], size: int) -> Iterator[List[Any]]:
+    """Splits values into consecutive chunks of at most `size` values."""
+    for start in range(0, len(values), size):
+        stop = start + size
+        yield values[start:stop]
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional, Type
+from typing import Any, Dict, List, Optional, Tuple, Type
 
 from .backends import String
 from .column import Column
@@ -105,6 +105,16 @@ class Model:
             None,
         )
 
+    @classmethod
+    def get_reverse_relation(cls, name: str) -> Optional[Tuple[Type, Column]]:
+        """Gets the model that refers to this one under the reverse name `name`, along with its connector column."""
+        for m in cls.dep_mapping.get(cls, []):
+            connector = m.get_connector_column(cls)
+            if connector.rel.reverse_name == name:
+                return m, connector
+
+        return None
+
     @classmethod
     def get_type_pref(cls, field: str, val: Column) -> str:
         type_pref_inc = "type_plchdr:%s" % val.type.__name__
@@ -150,21 +160,34 @@ class Model:
             fields = self_model.get_fields()
             return fields[attr]
         except KeyError as e:
-            for m in self_model.dep_mapping[self_model]:
-                connector = m.get_connector_column(self_model)
-                if connector.rel.reverse_name == attr:
-                    condition_dict = {
-                        connector.variable_name: getattr(self, self.get_primary_key_column().variable_name)
-                    }
-                    return Query(m).join(self_model).filter_by(**condition_dict).subquery()
+            relation = self_model.get_reverse_relation(attr)
+            if relation is None:
+                raise FieldNotExist(attr) from e
 
-            raise FieldNotExist(attr) from e
+            m, connector = relation
+            condition_dict = {connector.variable_name: getattr(self, self.get_primary_key_column().variable_name)}
+            return Query(m).join(self_model).filter_by(**condition_dict).subquery()
 
     @property
     def sql(self) -> str:
         """SQL statement for new object creation."""
-        return """INSERT INTO %s (%s) VALUES (%s);""" % (
-            self.get_table_name(),
-            ", ".join(self.attrs.keys()),
-            ", ".join("?" for _ in self.attrs),
+        return self.get_insert_sql(list(self.attrs.keys()))
+
+    @classmethod
+    def get_update_sql(cls, columns: List[str]) -> str:
+        """SQL statement updating the given columns of a row by its primary key."""
+        return """UPDATE %s SET %s WHERE %s = ?;""" % (
+            cls.get_table_name(),
+            ", ".join("%s = ?" % col for col in columns),
+            cls.get_primary_key_column().variable_name,
+        )
+
+    @classmethod
+    def get_insert_sql(cls, columns: List[str], row_count: int = 1) -> str:
+        """SQL statement inserting `row_count` rows of the given columns at once, with a multi-row `VALUES` clause."""
+        row = "(%s)" % ", ".join("?" for _ in columns)
+        return """INSERT INTO %s (%s) VALUES %s;""" % (
+            cls.get_table_name(),
+            ", ".join(columns),
+            ", ".join(row for _ in range(row_count)),
         )
@@ -1,39 +1,464 @@
-"""Contains :class:`.pool.ConnectionPool`."""
+"""Contains :class:`.pool.ConnectionPool` and its asyncio adapter :class:`.pool.AsyncConnectionPool`."""
 
-from queue import Queue
-from threading import Lock
-from typing import Optional
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from queue import Empty, Full, Queue
+from threading import Condition, Event, Lock, Thread
+from time import monotonic
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
 
 import pyodbc
 
+from .exceptions import PoolExhausted
+from .metrics import Metrics
+
 
 class ConnectionPool:
-    """Thread-safe connection pool for managing database connections.
+    """Thread-safe, bounded connection pool for managing database connections.
+
+    Uses a FIFO queue to manage idle connections. Implements lazy initialization of connections.
+
+    At most `pool_size` connections are kept idle in the pool, and at most `pool_size + max_overflow` connections are
+    open at the same time. When that ceiling is reached, checkouts block until a connection is released or closed, and
+    raise :class:`.exceptions.PoolExhausted` once `timeout` seconds have passed. Overflow connections, i.e. those that
+    do not fit into the idle queue on release, are closed.
 
-    Uses a FIFO queue to manage connections. Implements lazy initialization of connections.
+    Connections older than `recycle_after` seconds or idle for longer than `idle_timeout` seconds are closed and
+    replaced on checkout. With `pre_ping`, each checked out connection is first probed with `ping_sql`, and silently
+    replaced if the probe fails.
 
-    :param conn_str:    database location, along with auth params
-    :param pool_size:   size of the connection pool.
+    With `min_size`, :meth:`.pool.ConnectionPool.warm_up` opens that many connections concurrently up front, and idle
+    trimming never shrinks the pool below it: trims top it back up, and so does a background thread whenever a
+    connection is invalidated. With `trim_interval`, idle connections are trimmed by a background thread
+    every that many seconds, until :meth:`.pool.ConnectionPool.close_all`; otherwise, schedule
+    :meth:`.pool.ConnectionPool.trim_idle` yourself.
+
+    Connections that raised a connection-level error, see :meth:`.pool.ConnectionPool.is_disconnect`, should be handed
+    to :meth:`.pool.ConnectionPool.invalidate` rather than released, as sessions and engines do.
+
+    :param conn_str:        database location, along with auth params
+    :param pool_size:       size of the connection pool
+    :param max_overflow:    keyword-only. Number of connections allowed on top of `pool_size`. Optional
+    :param min_size:        keyword-only. Number of connections to keep open and idle at the least. Optional
+    :param timeout:         keyword-only. Default number of seconds to wait for a connection. `None` waits forever.
+                            Optional
+    :param pre_ping:        keyword-only. Whether or not to probe connections on checkout. Optional
+    :param ping_sql:        keyword-only. Statement used to probe connections. Optional
+    :param recycle_after:   keyword-only. Max age of a connection in seconds. Optional
+    :param idle_timeout:    keyword-only. Max number of seconds a connection may sit idle in the pool. Optional
+    :param trim_interval:   keyword-only. Number of seconds between background idle trims. Optional
+    :param metrics:         keyword-only. Instrumentation that pool events are reported to. Optional.
     """
 
-    def __init__(self, conn_str: str, pool_size: int) -> None:
+    disconnect_errors: Tuple[Type[BaseException], ...] = (pyodbc.OperationalError, pyodbc.InterfaceError)
+
+    def __init__(
+        self,
+        conn_str: str,
+        pool_size: int,
+        *,
+        max_overflow: int = 10,
+        min_size: int = 0,
+        timeout: Optional[float] = 30.0,
+        pre_ping: bool = False,
+        ping_sql: str = "SELECT 1",
+        recycle_after: Optional[float] = None,
+        idle_timeout: Optional[float] = None,
+        trim_interval: Optional[float] = None,
+        metrics: Optional[Metrics] = None,
+    ) -> None:
+        if pool_size < 1:
+            raise ValueError("Pool size should be a positive integer.")
+
+        if max_overflow < 0:
+            raise ValueError("Max overflow cannot be negative.")
+
+        if not 0 <= min_size <= pool_size:
+            raise ValueError("Min size should be between zero and pool size.")
+
+        if trim_interval is not None and trim_interval <= 0:
+            raise ValueError("Trim interval should be a positive number of seconds.")
+
         self.conn_str = conn_str
-        self.pool = Queue(maxsize=pool_size)
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.min_size = min_size
+        self.timeout = timeout
+        self.pre_ping = pre_ping
+        self.ping_sql = ping_sql
+        self.recycle_after = recycle_after
+        self.idle_timeout = idle_timeout
+        self.trim_interval = trim_interval
+        self.pool: Queue = Queue(maxsize=pool_size)
         self.lock = Lock()
+        self.available = Condition(self.lock)
+        self.size = 0
+        self.created_at: Dict[int, float] = {}
+        self.idle_since: Dict[int, float] = {}
+        self.checked_out_at: Dict[int, float] = {}
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.ready = Event()
+        self.warm_up_error: Optional[BaseException] = None
+        if not self.min_size:
+            self.ready.set()
+
+        self.closed = Event()
+        self.trim_error: Optional[BaseException] = None
+        self.replenishing = False
+        self.replenish_error: Optional[BaseException] = None
+        if self.trim_interval is not None:
+            Thread(target=self._trim_periodically, name="enorm-pool-trim", daemon=True).start()
+
+    @property
+    def max_size(self) -> int:
+        """Maximum number of connections the pool opens at the same time."""
+        return self.pool_size + self.max_overflow
+
+    @property
+    def in_use(self) -> int:
+        """Number of connections currently checked out."""
+        return self.size - self.pool.qsize()
 
     def acquire(self, timeout: Optional[float] = None) -> pyodbc.Connection:
-        """Acquires a connection from the pool."""
-        with self.lock:
-            if self.pool.empty():
-                return pyodbc.connect(self.conn_str)
-        return self.pool.get(timeout=timeout)
+        """Acquires a connection from the pool.
+
+        Reuses a healthy idle connection if there is one, opens a new one if the pool is below its ceiling, and
+        otherwise waits until a connection is released or closed, checking again for both after every wake-up.
+
+        :param timeout: number of seconds to wait for a connection. Defaults to the pool-wide timeout. Optional.
+        """
+        if timeout is None:
+            timeout = self.timeout
+
+        started_at = monotonic()
+        while True:
+            with self.available:
+                while True:
+                    try:
+                        conn = self.pool.get_nowait()
+                        break
+                    except Empty:
+                        pass
+
+                    if self.size < self.max_size:
+                        self.size += 1
+                        conn = None
+                        break
+
+                    remaining = None if timeout is None else timeout - (monotonic() - started_at)
+                    if remaining is not None and remaining <= 0:
+                        raise PoolExhausted(self.max_size, monotonic() - started_at)
+
+                    self.available.wait(remaining)
+
+            if conn is None:
+                return self._checkout(self._connect(), started_at)
+
+            if self._is_stale(conn) or (self.pre_ping and not self._ping(conn)):
+                self._discard(conn)
+                continue
+
+            return self._checkout(conn, started_at)
 
     def release(self, conn: pyodbc.Connection) -> None:
-        """Releases a connection back to the pool."""
-        self.pool.put(conn)
+        """Releases a connection back to the pool. Closes the connection if the pool is already full."""
+        self._checkin(conn)
+        if not self._put_idle(conn):
+            self._discard(conn)
+        self._report_state()
+
+    def invalidate(self, conn: pyodbc.Connection) -> None:
+        """Closes a checked out connection that is known to be broken, instead of releasing it back to the pool. With
+        `min_size`, a background thread then opens connections until that many of them are idle.
+        """
+        self._checkin(conn)
+        self._discard(conn)
+        self._report_state()
+        if self.min_size and self.pool.qsize() < self.min_size:
+            self._replenish()
+
+    def warm_up(self, background: bool = False) -> None:
+        """Opens connections concurrently until at least `min_size` of them are idle, and marks the pool as ready.
+
+        :param background:  whether to return right away and warm up on a separate thread. Wait on `self.ready` to know
+                            when it is done. Optional.
+        """
+        if background:
+            self.ready.clear()
+            Thread(target=self._warm_up, name="enorm-pool-warm-up", daemon=True).start()
+        else:
+            self._warm_up()
+            if self.warm_up_error is not None:
+                raise self.warm_up_error
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until the pool is warmed up. Returns whether or not it is within `timeout` seconds, and the warm-up
+        went through. If it failed, the error is in `self.warm_up_error`.
+        """
+        return self.ready.wait(timeout) and self.warm_up_error is None
+
+    def fill(self) -> int:
+        """Opens connections concurrently, one thread per connection, until at least `min_size` of them are idle.
+
+        :return: number of connections opened.
+        """
+        reserved = 0
+        while self.pool.qsize() + reserved < self.min_size and self._reserve_slot():
+            reserved += 1
+
+        if not reserved:
+            return 0
+
+        with ThreadPoolExecutor(max_workers=reserved, thread_name_prefix="enorm-pool-fill") as executor:
+            futures = [executor.submit(self._connect) for _ in range(reserved)]
+
+        opened, errors = 0, []
+        for future in futures:
+            try:
+                conn = future.result()
+            except Exception as e:
+                errors.append(e)
+                continue
+
+            self.idle_since[id(conn)] = monotonic()
+            if not self._put_idle(conn):
+                self._discard(conn)
+                continue
+            opened += 1
+
+        self._report_state()
+        if errors:
+            raise errors[0]
+
+        return opened
+
+    def trim_idle(self) -> int:
+        """Closes idle connections that are stale, i.e. too old or idle for too long, then tops the pool back up to
+        `min_size`.
+
+        Meant to be called periodically, e.g. from a background timer. Stale connections are trimmed on checkout anyway.
+
+        :return: number of connections closed.
+        """
+        idle: List[pyodbc.Connection] = []
+        while True:
+            try:
+                idle.append(self.pool.get_nowait())
+            except Empty:
+                break
+
+        trimmed = 0
+        for conn in idle:
+            if self._is_stale(conn):
+                self._discard(conn)
+                trimmed += 1
+                continue
+
+            if not self._put_idle(conn):
+                self._discard(conn)
+
+        self.fill()
+        return trimmed
 
     def close_all(self) -> None:
-        """Closes all connections in the pool."""
-        while not self.pool.empty():
-            conn = self.pool.get()
+        """Closes all idle connections in the pool, and stops the background trimming."""
+        self.closed.set()
+        while True:
+            try:
+                conn = self.pool.get_nowait()
+            except Empty:
+                break
+            self._discard(conn)
+        self._report_state()
+
+    @classmethod
+    def is_disconnect(cls, error: Optional[BaseException]) -> bool:
+        """Whether `error`, or an error it was raised from or while handling, is a connection-level error of the
+        driver, after which the connection cannot be trusted.
+        """
+        while error is not None:
+            if isinstance(error, cls.disconnect_errors):
+                return True
+            error = error.__cause__ or error.__context__
+
+        return False
+
+    def _trim_periodically(self) -> None:
+        while not self.closed.wait(self.trim_interval):
+            try:
+                self.trim_idle()
+            except Exception as e:
+                self.trim_error = e
+
+    def _warm_up(self) -> None:
+        self.warm_up_error = None
+        try:
+            self.fill()
+        except Exception as e:
+            self.warm_up_error = e
+        finally:
+            self.ready.set()
+
+    def _replenish(self) -> None:
+        with self.lock:
+            if self.replenishing or self.closed.is_set():
+                return
+            self.replenishing = True
+
+        Thread(target=self._fill_in_background, name="enorm-pool-replenish", daemon=True).start()
+
+    def _fill_in_background(self) -> None:
+        try:
+            self.fill()
+            self.replenish_error = None
+        except Exception as e:
+            self.replenish_error = e
+        finally:
+            with self.lock:
+                self.replenishing = False
+
+    def _reserve_slot(self) -> bool:
+        with self.lock:
+            if self.size >= self.max_size:
+                return False
+
+            self.size += 1
+            return True
+
+    def _free_slot(self) -> None:
+        with self.available:
+            self.size -= 1
+            self.available.notify()
+
+    def _put_idle(self, conn: pyodbc.Connection) -> bool:
+        """Puts a connection into the idle queue and wakes up a waiting checkout. Returns whether there was room."""
+        try:
+            self.pool.put_nowait(conn)
+        except Full:
+            return False
+
+        with self.available:
+            self.available.notify()
+        return True
+
+    def _connect(self) -> pyodbc.Connection:
+        try:
+            conn = pyodbc.connect(self.conn_str)
+        except BaseException:
+            self._free_slot()
+            raise
+
+        self.created_at[id(conn)] = monotonic()
+        self.metrics.connection_created()
+        return conn
+
+    def _checkout(self, conn: pyodbc.Connection, started_at: float) -> pyodbc.Connection:
+        now = monotonic()
+        self.checked_out_at[id(conn)] = now
+        self.metrics.checkout_wait(now - started_at)
+        self._report_state()
+        return conn
+
+    def _checkin(self, conn: pyodbc.Connection) -> None:
+        now = monotonic()
+        checked_out_at = self.checked_out_at.pop(id(conn), None)
+        if checked_out_at is not None:
+            self.metrics.connection_held(now - checked_out_at)
+        self.idle_since[id(conn)] = now
+
+    def _report_state(self) -> None:
+        self.metrics.pool_state(self.in_use, self.pool.qsize())
+
+    def _discard(self, conn: pyodbc.Connection) -> None:
+        self.created_at.pop(id(conn), None)
+        self.idle_since.pop(id(conn), None)
+        try:
             conn.close()
+        except pyodbc.Error:
+            pass
+        finally:
+            self._free_slot()
+            self.metrics.connection_closed()
+
+    def _is_stale(self, conn: pyodbc.Connection) -> bool:
+        now = monotonic()
+        if self.recycle_after is not None and now - self.created_at.get(id(conn), now) > self.recycle_after:
+            return True
+
+        if self.idle_timeout is not None and now - self.idle_since.get(id(conn), now) > self.idle_timeout:
+            return True
+
+        return False
+
+    def _ping(self, conn: pyodbc.Connection) -> bool:
+        try:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(self.ping_sql)
+            finally:
+                cursor.close()
+        except pyodbc.Error:
+            return False
+
+        return True
+
+
+class AsyncConnectionPool:
+    """Asyncio adapter of a :class:`.pool.ConnectionPool`.
+
+    Runs every blocking driver call on a thread pool executor sized to the ceiling of the underlying pool, so that
+    awaiting never blocks the event loop. Checkouts are gated by a semaphore of the same size: tasks waiting for a
+    connection wait on the event loop, not on an executor thread.
+
+    :param pool:    connection pool to adapt.
+    """
+
+    def __init__(self, pool: ConnectionPool) -> None:
+        self.pool = pool
+        self.executor = ThreadPoolExecutor(max_workers=pool.max_size, thread_name_prefix="enorm-async-pool")
+        self.semaphore = asyncio.Semaphore(pool.max_size)
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Runs a blocking callable on the executor and awaits its result."""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, partial(func, *args))
+
+    async def acquire(self, timeout: Optional[float] = None) -> pyodbc.Connection:
+        """Acquires a connection from the pool without blocking the event loop.
+
+        :param timeout: number of seconds to wait for a connection. Defaults to the pool-wide timeout. Optional.
+        """
+        if timeout is None:
+            timeout = self.pool.timeout
+
+        started_at = monotonic()
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), timeout)
+        except asyncio.TimeoutError:
+            raise PoolExhausted(self.pool.max_size, monotonic() - started_at)
+
+        remaining = None if timeout is None else max(timeout - (monotonic() - started_at), 0)
+        try:
+            return await self.run(self.pool.acquire, remaining)
+        except BaseException:
+            self.semaphore.release()
+            raise
+
+    async def release(self, conn: pyodbc.Connection) -> None:
+        """Releases a connection back to the pool."""
+        try:
+            await self.run(self.pool.release, conn)
+        finally:
+            self.semaphore.release()
+
+    async def invalidate(self, conn: pyodbc.Connection) -> None:
+        """Closes a checked out connection that is known to be broken, and frees its checkout for a waiting task."""
+        try:
+            await self.run(self.pool.invalidate, conn)
+        finally:
+            self.semaphore.release()
+
+    async def close_all(self) -> None:
+        """Closes all idle connections in the pool and shuts the executor down."""
+        await self.run(self.pool.close_all)
+        self.executor.shutdown(wait=False)
@@ -1,6 +1,6 @@
 """Contains :class:`.subquery.Subquery` and its helpers."""
 
-from typing import Any, List
+from typing import Any, Iterable, List
 
 from .column import VirtualField
 from .exceptions import EntityError
@@ -14,15 +14,21 @@ class Subquery:
     Never directly instantiated, but rather initialised by invoking :meth:`.query.Query.subquery()`.
 
     :param inner_sql:       SQL string of the view represented by the subquery
-    :param column_names:    original names of the columns in that view.
+    :param column_names:    original names of the columns in that view
+    :param params:          values bound to the placeholders of the inner SQL, in order. Optional
+    :param tables:          names of the tables the inner SQL reads from. Optional.
     """
 
     subquery_idx = 0
 
-    def __init__(self, inner_sql: str, column_names: List[str]) -> None:
+    def __init__(
+        self, inner_sql: str, column_names: List[str], params: Iterable[Any] = (), tables: Iterable[str] = ()
+    ) -> None:
         type(self).subquery_idx += 1
         self.inner_sql = inner_sql
         self.column_names = column_names
+        self.params = tuple(params)
+        self.tables = frozenset(tables)
         self.view_name = "anon_%d" % self.subquery_idx
         self.full_sql = "(%s) AS %s" % (self.inner_sql, self.view_name)
 
@@ -0,0 +1,84 @@
+"""Compares the per-call time of :meth:`.query.Query.filter_by` and of joins on the connector key with those of the
+former implementations, which built their expressions by `exec` and `eval` of formatted strings.
+
+Run from the root of the repository::
+
+    python -m benchmarks.expression_construction --calls 200000
+"""
+
+import argparse
+from timeit import timeit
+from typing import Any, Callable, Dict
+
+from EnORM import Column, ForeignKey, Integer, Model, Serial, String
+from EnORM.query import Query
+
+
+class Customer(Model):
+    id = Column(Serial, primary_key=True)
+    email = Column(String, 100, nullable=False)
+
+
+class Invoice(Model):
+    id = Column(Serial, primary_key=True)
+    year = Column(Integer)
+    customer_id = Column(Serial, None, ForeignKey(Customer, reverse_name="invoices"))
+    status = Column(String, 20, nullable=False)
+
+
+def legacy_filter_by(query: Query, **kwcrts: Any) -> Query:
+    """The former :meth:`.query.Query.filter_by`."""
+    query.keyword_criteria.update(kwcrts)
+    model = query.mapped_class
+    exec("from %s import %s" % (model.__module__, model.__name__), globals(), globals())
+    criteria = [eval("%s.%s == '%s'" % (model.__name__, key, val)) for key, val in kwcrts.items()]
+    return query.filter(*criteria)
+
+
+def legacy_join(query: Query, mapped: Any) -> Query:
+    """The former :meth:`.query.Query.join` on the connector key."""
+    self_model = query.mapped_class
+    connector_column = self_model.get_connector_column(mapped)
+    query.builder.add_to_data("join", mapped.get_table_name())
+    exec("from %s import %s" % (self_model.__module__, self_model.__name__), globals(), globals())
+    exec("from %s import %s" % (mapped.__module__, mapped.__name__), globals(), globals())
+    expr = eval(
+        "%s.%s == %s.%s"
+        % (
+            self_model.__name__,
+            connector_column.variable_name,
+            mapped.__name__,
+            mapped.get_primary_key_column().variable_name,
+        )
+    )
+    query.builder.add_to_data("on", expr)
+    return query
+
+
+CASES: Dict[str, Dict[str, Callable[[], Any]]] = {
+    "filter_by": {
+        "exec/eval": lambda: legacy_filter_by(Query(Invoice), year=2023, status="paid"),
+        "columns": lambda: Query(Invoice).filter_by(year=2023, status="paid"),
+    },
+    "join": {
+        "exec/eval": lambda: legacy_join(Query(Invoice), Customer),
+        "columns": lambda: Query(Invoice).join(Customer),
+    },
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--calls", type=int, default=50_000)
+    args = parser.parse_args()
+
+    for case, impls in CASES.items():
+        baseline = None
+        for name, func in impls.items():
+            per_call = timeit(func, number=args.calls) / args.calls
+            baseline = baseline or per_call
+            print("%-9s %-9s %7.2f us/call  x%.1f" % (case, name, per_call * 1e6, baseline / per_call))
+
+
+if __name__ == "__main__":
+    main()
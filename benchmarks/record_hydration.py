@@ -0,0 +1,80 @@
+"""Compares the hydration time, attribute access time and memory of :class:`.query.Record` with those of the former,
+dict-backed record.
+
+Run from the root of the repository::
+
+    python -m benchmarks.record_hydration --rows 1000000
+"""
+
+import argparse
+import gc
+import tracemalloc
+from datetime import date
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Tuple
+
+from EnORM.query import Record
+
+COL_NAMES = ["id", "full_name", "email", "age", "joined_on", "is_active"]
+
+
+class DictRecord:
+    """The former record: a dict of the row per record, looked up by `__getattr__`."""
+
+    def __init__(self, dct: Dict[str, Any], query: Any) -> None:
+        super().__setattr__("dct", dct)
+        super().__setattr__("query", query)
+        super().__setattr__("dirty", {})
+
+    def __getattr__(self, attr: str) -> Any:
+        return self.dct[attr]
+
+
+def hydrate_dict_records(rows: List[Tuple[Any, ...]]) -> List[Any]:
+    return [DictRecord(dict(zip(COL_NAMES, row)), None) for row in rows]
+
+
+def hydrate_records(rows: List[Tuple[Any, ...]]) -> List[Any]:
+    record_cls = Record.for_columns(tuple(COL_NAMES))
+    return [record_cls(row, None) for row in rows]
+
+
+def measure(hydrate: Callable[[List[Tuple[Any, ...]]], List[Any]], rows: List[Tuple[Any, ...]]) -> Dict[str, float]:
+    gc.collect()
+    tracemalloc.start()
+    records = hydrate(rows)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del records
+
+    gc.collect()
+    started_at = perf_counter()
+    records = hydrate(rows)
+    hydration = perf_counter() - started_at
+
+    started_at = perf_counter()
+    for rec in records:
+        _ = rec.full_name, rec.age, rec.is_active
+    access = perf_counter() - started_at
+    return {"hydration_s": hydration, "access_s": access, "memory_mb": memory / 2**20}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    rows = [
+        (idx, "User %d" % idx, "user%d@example.com" % idx, idx % 90, date(2020, 1, 1), bool(idx % 2))
+        for idx in range(args.rows)
+    ]
+    for name, hydrate in (("dict-backed", hydrate_dict_records), ("tuple-backed", hydrate_records)):
+        result = measure(hydrate, rows)
+        print(
+            "%-13s hydration %.3fs  access %.3fs  memory %.1f MiB"
+            % (name, result["hydration_s"], result["access_s"], result["memory_mb"])
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import unittest
 from typing import Any, List, Tuple
+from unittest import mock
 
 from EnORM import CASCADE, Column, ForeignKey, Integer, Model, Serial, String
 from EnORM.db_engine import AbstractEngine, DialectInferrer
@@ -21,6 +23,11 @@ class FakeCursor:
     def execute(self, sql: str, *args: Any) -> Any:
         self.connection.executions.append([sql, *args])
         self.description = (("id", "col"), ("full_name", "col"), ("age", "col"))
+        self.position = 0
+
+    def executemany(self, sql: str, seq_of_params: List[Tuple[Any, ...]]) -> None:
+        for params in seq_of_params:
+            self.execute(sql, *params)
 
     def close(self) -> None:
         self.open = False
@@ -28,6 +35,11 @@ class FakeCursor:
     def fetchall(self) -> List[Tuple[int, str]]:
         return [(17, "Jacques Trate", 30), (34, "Joanna Males", 30)]
 
+    def fetchmany(self, size: int) -> List[Tuple[int, str]]:
+        rows = [row for idx, row in enumerate(self.fetchall()) if self.position <= idx < self.position + size]
+        self.position += len(rows)
+        return rows
+
 
 class FakeConnection:
     def __init__(self, conn_str: str) -> None:
@@ -42,12 +54,23 @@ class FakeConnection:
         self.executions = []
 
     def rollback(self) -> None:
-        _ = self.executions.pop()
+        self.executions = []
 
     def close(self) -> None:
         self.open = False
 
 
+def patch_pool_connect(test: unittest.TestCase) -> mock.MagicMock:
+    """Makes connection pools open fake connections for the duration of `test`, and resets the active session after it.
+    Returns the patched `pyodbc.connect`.
+    """
+    patcher = mock.patch("EnORM.pool.pyodbc.connect", side_effect=FakeConnection)
+    connect = patcher.start()
+    test.addCleanup(patcher.stop)
+    test.addCleanup(AbstractEngine.active_session.set, None)
+    return connect
+
+
 class FakeEngine(AbstractEngine):
     def __init__(self, conn_str: str) -> None:
         self.dialect_inferrer = DialectInferrer(conn_str)
@@ -55,9 +78,21 @@ class FakeEngine(AbstractEngine):
         self.conn = FakeConnection(conn_str)
         self.cursor = self.conn.cursor()
 
+    def get_connection(self) -> FakeConnection:
+        return self.conn
+
+    def read_cursor(self, query: Any = None) -> Any:
+        return super().read_cursor(self, query)
+
+    def stream_cursor(self, query: Any = None) -> Any:
+        return super().stream_cursor(self, query)
+
     def release_connection(self, conn: FakeConnection) -> None:
         conn.close()
 
+    def invalidate_connection(self, conn: FakeConnection) -> None:
+        conn.close()
+
 
 class Human(Model):
     id = Column(Serial, primary_key=True)
@@ -0,0 +1,142 @@
+import asyncio
+import threading
+import time
+import unittest
+from typing import Any, List
+from unittest import mock
+
+import pyodbc
+
+from EnORM.db_engine import AbstractEngine, AsyncDBEngine
+from EnORM.db_session import AsyncDBSession
+from EnORM.exceptions import MethodChainingError, PoolExhausted
+from EnORM.query import Query, QuerySet, Record
+
+from .defs import POSTGRESQL_CONN_STR, FakeConnection, FakeCursor, Human, Pet, patch_pool_connect
+
+
+class TestAsync(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        patch_pool_connect(self)
+        self.engine = AsyncDBEngine(POSTGRESQL_CONN_STR, pool_size=1, max_overflow=0, pool_timeout=0.05)
+        Human.alias = None
+
+    async def asyncTearDown(self) -> None:
+        await self.engine.dispose_async()
+
+    async def test_async_session_lifecycle(self) -> None:
+        async with AsyncDBSession(self.engine) as session:
+            self.assertIs(AbstractEngine.get_active_session(), session)
+            self.assertEqual(self.engine.connection_pool.size, 1)
+        self.assertIsNone(session.conn)
+        self.assertIsNone(AbstractEngine.active_session.get())
+        self.assertEqual(self.engine.connection_pool.pool.qsize(), 1)
+
+    async def test_async_pool_exhausted(self) -> None:
+        async with AsyncDBSession(self.engine):
+            with self.assertRaises(PoolExhausted):
+                await self.engine.get_connection_async()
+
+    async def test_async_checkout_waits_within_timeout(self) -> None:
+        conn = await self.engine.get_connection_async()
+        asyncio.get_running_loop().call_later(0.05, asyncio.ensure_future, self.engine.release_connection_async(conn))
+        pool = self.engine.connection_pool
+        with mock.patch.object(pool, "acquire", wraps=pool.acquire) as acquire:
+            conn = await self.engine.get_connection_async(timeout=0.5)
+        self.assertLessEqual(acquire.call_args[0][0], 0.45)
+        await self.engine.release_connection_async(conn)
+
+    async def test_async_engine_dispose(self) -> None:
+        engine = AsyncDBEngine(POSTGRESQL_CONN_STR, pool_size=1)
+        conn = await engine.get_connection_async()
+        await engine.release_connection_async(conn)
+        engine.dispose()
+        self.assertFalse(conn.open)
+        self.assertTrue(engine.connection_pool.closed.is_set())
+        with self.assertRaises(RuntimeError):
+            engine.async_pool.executor.submit(print)
+
+    async def test_async_checkout_woken_by_invalidated_connection(self) -> None:
+        conn = await self.engine.get_connection_async()
+        waiter = asyncio.ensure_future(self.engine.get_connection_async(timeout=5))
+        await asyncio.sleep(0.01)
+        self.assertFalse(waiter.done())
+        await self.engine.invalidate_connection_async(conn)
+        fresh = await waiter
+        self.assertIsNot(fresh, conn)
+        self.assertFalse(conn.open)
+        await self.engine.release_connection_async(fresh)
+
+    async def test_async_query_methods(self) -> None:
+        async with AsyncDBSession(self.engine) as session:
+            res = await session.query(Human, Human.id, Human.full_name, Human.age).all_async()
+            self.assertIsInstance(res, QuerySet)
+            self.assertEqual(len(res), 2)
+            first = await Query(Human, Human.id, Human.full_name, Human.age).first_async()
+            self.assertDictEqual(first.dct, {"id": 17, "full_name": "Jacques Trate", "age": 30})
+            with self.assertRaises(MethodChainingError):
+                _ = await Query(Human).filter(Human.age == 30).get_async(id=17)
+
+    async def test_async_iteration(self) -> None:
+        async with AsyncDBSession(self.engine):
+            q = Query(Human, Human.id, Human.full_name, Human.age)
+            q.stream_batch_size = 1
+            records = [rec async for rec in q]
+        self.assertTrue(all(isinstance(rec, Record) for rec in records))
+        self.assertListEqual([rec.id for rec in records], [17, 34])
+
+    async def test_async_iteration_routing_and_metrics(self) -> None:
+        async with AsyncDBSession(self.engine) as session:
+            q = Query(Human, Human.id, Human.full_name, Human.age)
+            with mock.patch.object(self.engine, "stream_cursor", wraps=self.engine.stream_cursor) as stream_cursor:
+                _ = [rec async for rec in q]
+            stream_cursor.assert_called_once_with(session, q)
+        labels = (("operation", "SELECT"), ("table", "humans"))
+        histograms = self.engine.metrics.snapshot()["histograms"]
+        self.assertEqual(histograms[("enorm_statement_fetch_seconds", labels)]["count"], 1)
+
+    async def test_async_concurrent_queries_share_connection_safely(self) -> None:
+        engine = AsyncDBEngine(POSTGRESQL_CONN_STR, pool_size=4)
+        self.addAsyncCleanup(engine.dispose_async)
+        in_flight: List[int] = [0, 0]
+        lock = threading.Lock()
+
+        def fetchall(cursor: FakeCursor) -> Any:
+            with lock:
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight)
+            time.sleep(0.01)
+            with lock:
+                in_flight[0] -= 1
+            return [(17, "Jacques Trate", 30)]
+
+        async with AsyncDBSession(engine):
+            with mock.patch.object(FakeCursor, "fetchall", fetchall):
+                results = await asyncio.gather(*(Query(Human, Human.id).all_async() for _ in range(4)))
+        self.assertListEqual([len(res) for res in results], [1, 1, 1, 1])
+        self.assertEqual(in_flight[1], 1)
+
+    async def test_async_failed_commit(self) -> None:
+        session = AsyncDBSession(self.engine)
+        async with session:
+            conn = session.conn
+            session.add(Pet(name="Sakura", age=5))
+            with mock.patch.object(FakeConnection, "commit", side_effect=pyodbc.Error):
+                with self.assertRaises(pyodbc.Error):
+                    await session.__aexit__(None, None, None)
+        self.assertIsNone(AbstractEngine.active_session.get())
+        async with AsyncDBSession(self.engine) as other:
+            self.assertIs(other.conn, conn)
+            self.assertListEqual(other.conn.executions, [])
+
+        with self.assertRaises(pyodbc.Error):
+            async with AsyncDBSession(self.engine) as session:
+                with mock.patch.object(FakeConnection, "commit", side_effect=pyodbc.Error):
+                    with mock.patch.object(FakeConnection, "rollback", side_effect=pyodbc.Error):
+                        await session.__aexit__(None, None, None)
+        self.assertFalse(conn.open)
+        self.assertEqual(self.engine.connection_pool.size, 0)
+
+    async def test_await_outside_async_session(self) -> None:
+        with self.assertRaises(MethodChainingError):
+            _ = await Query(Human).all_async()
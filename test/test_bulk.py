@@ -0,0 +1,89 @@
+import unittest
+from datetime import date
+from unittest import mock
+
+from EnORM import Binary, Boolean, Column, Date, DBSession, Float, Model, Serial, String
+from EnORM.bulk import CopyStream, CopyTextEncoder
+
+from .defs import POSTGRESQL_CONN_STR, SQLITE_CONN_STR, FakeEngine
+
+
+class Reading(Model):
+    id = Column(Serial, primary_key=True)
+    value = Column(Float)
+    valid = Column(Boolean)
+    taken_on = Column(Date)
+    raw = Column(Binary)
+    sensor = Column(String, 20, nullable=False)
+
+
+class TestBulkLoad(unittest.TestCase):
+    def test_copy_text_encoding(self) -> None:
+        encoder = CopyTextEncoder(Reading, ["sensor", "value", "valid", "taken_on", "raw"])
+        self.assertEqual(
+            encoder.encode_row(("a\tb\\c", 1.5, True, date(2024, 2, 29), b"\x00\xff")),
+            "a\\tb\\\\c\t1.5\tt\t2024-02-29\t\\\\x00ff\n",
+        )
+        self.assertEqual(encoder.encode_row({"sensor": "s1"}), "s1\t\\N\t\\N\t\\N\t\\N\n")
+        self.assertEqual(CopyTextEncoder.array(["x", None, ['"y"']]), '{"x",NULL,{"\\"y\\""}}')
+
+    def test_copy_chunks_are_bounded(self) -> None:
+        encoder = CopyTextEncoder(Reading, ["sensor"])
+        chunks = list(encoder.encode((("s%d" % idx,) for idx in range(10)), 9))
+        self.assertListEqual(chunks, [b"s0\ns1\ns2\n", b"s3\ns4\ns5\n", b"s6\ns7\ns8\n", b"s9\n"])
+
+        stream = CopyStream(iter(chunks))
+        self.assertEqual(stream.read(4), b"s0\ns")
+        self.assertEqual(stream.readline(), b"1\n")
+        self.assertEqual(stream.read(), b"s2\ns3\ns4\ns5\ns6\ns7\ns8\ns9\n")
+        self.assertEqual(stream.read(8192), b"")
+
+    def test_bulk_load_copy(self) -> None:
+        payloads = []
+        copy_conn = mock.Mock()
+        copy_conn.cursor.return_value.copy_expert.side_effect = lambda sql, stream: payloads.append(stream.read())
+        engine = FakeEngine(POSTGRESQL_CONN_STR)
+        engine.copy_connect = mock.Mock(return_value=copy_conn)
+        with DBSession(engine) as sess:
+            rows = (Reading(sensor="s%d" % idx, value=idx / 2) for idx in range(3))
+            with mock.patch.object(sess.conn, "commit") as commit:
+                sess.bulk_load(Reading, rows, ["sensor", "value"])
+            commit.assert_called_once_with()
+            copy_conn.cursor.return_value.copy_expert.assert_called_once_with(
+                "COPY readings (sensor, value) FROM STDIN", mock.ANY
+            )
+            self.assertListEqual(payloads, [b"s0\t0.0\ns1\t0.5\ns2\t1.0\n"])
+            copy_conn.commit.assert_called_once_with()
+            copy_conn.close.assert_called_once_with()
+            self.assertIsNotNone(sess.last_write_at)
+
+        copy_conn.reset_mock()
+        copy_conn.cursor.return_value.copy_expert.side_effect = RuntimeError("COPY failed")
+        with DBSession(engine) as sess:
+            with self.assertRaises(RuntimeError):
+                sess.bulk_load(Reading, [("s0", 0.0)], ["sensor", "value"])
+            copy_conn.commit.assert_not_called()
+            copy_conn.close.assert_called_once_with()
+
+    def test_bulk_load_fallback(self) -> None:
+        with DBSession(FakeEngine(SQLITE_CONN_STR), insert_batch_size=2) as sess:
+            rows = iter([("s0", 0.0), ("s1", 0.5), ("s2", 1.0)])
+            with mock.patch.object(sess.cursor, "executemany") as executemany:
+                sess.bulk_load(Reading, rows, ["sensor", "value"])
+            sql = "INSERT INTO readings (sensor, value) VALUES (?, ?);"
+            self.assertListEqual(
+                executemany.call_args_list,
+                [mock.call(sql, [("s0", 0.0), ("s1", 0.5)]), mock.call(sql, [("s2", 1.0)])],
+            )
+
+        with DBSession(FakeEngine(SQLITE_CONN_STR), insert_mode="multi_values") as sess:
+            with mock.patch.object(sess.cursor, "execute") as execute:
+                sess.bulk_load(Reading, [{"sensor": "s0", "valid": False}])
+            execute.assert_called_once_with(
+                "INSERT INTO readings (value, valid, taken_on, raw, sensor) VALUES (?, ?, ?, ?, ?);",
+                None,
+                False,
+                None,
+                None,
+                "s0",
+            )
@@ -0,0 +1,125 @@
+import unittest
+from unittest import mock
+
+from EnORM import DBEngine, DBSession
+from EnORM.cache import ResultCache
+from EnORM.query import Query
+
+from .defs import POSTGRESQL_CONN_STR, Human, Pet, patch_pool_connect
+
+
+class TestResultCache(unittest.TestCase):
+    def test_result_cache_get_and_put(self) -> None:
+        cache = ResultCache()
+        self.assertIsNone(cache.get(("SELECT 1", ())))
+        cache.put(("SELECT 1", ()), ["humans"], None, ["one"], [[1]])
+        self.assertEqual(cache.get(("SELECT 1", ())), (["one"], [(1,)]))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(cache.stats()["entries"], 1)
+
+    def test_result_cache_lru_eviction(self) -> None:
+        cache = ResultCache(max_entries=2)
+        cache.put("a", [], None, ["x"], [(1,)])
+        cache.put("b", [], None, ["x"], [(2,)])
+        cache.get("a")
+        cache.put("c", [], None, ["x"], [(3,)])
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.evictions, 1)
+
+        size = ResultCache.estimate_size(((1,),))
+        cache = ResultCache(max_bytes=2 * size)
+        cache.put("a", [], None, ["x"], [(1,)])
+        cache.put("b", [], None, ["x"], [(2,)])
+        cache.put("c", [], None, ["x"], [(3,)])
+        self.assertEqual(len(cache), 2)
+        self.assertLessEqual(cache.size, 2 * size)
+        cache.put("d", [], None, ["x"], [(4,), (5,), (6,)])
+        self.assertIsNone(cache.get("d"))
+
+    def test_result_cache_ttl(self) -> None:
+        cache = ResultCache()
+        with mock.patch("EnORM.cache.monotonic", return_value=100.0):
+            cache.put("a", [], 10, ["x"], [(1,)])
+        with mock.patch("EnORM.cache.monotonic", return_value=105.0):
+            self.assertIsNotNone(cache.get("a"))
+        with mock.patch("EnORM.cache.monotonic", return_value=110.0):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+    def test_result_cache_invalidate(self) -> None:
+        cache = ResultCache()
+        cache.put("a", ["humans"], None, ["x"], [(1,)])
+        cache.put("b", ["humans", "pets"], None, ["x"], [(2,)])
+        cache.put("c", ["pets"], None, ["x"], [(3,)])
+        generation = cache.generation
+        cache.invalidate(["humans"])
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.invalidations, 2)
+        cache.put("a", ["humans"], None, ["x"], [(1,)], generation)
+        self.assertIsNone(cache.get("a"))
+
+        with self.assertRaises(ValueError):
+            ResultCache(max_entries=0)
+
+
+class TestQueryCache(unittest.TestCase):
+    def setUp(self) -> None:
+        patch_pool_connect(self)
+        Human.alias = None
+        Pet.name.alias = None
+        self.cache = ResultCache()
+        self.eng = DBEngine(POSTGRESQL_CONN_STR, pool_size=1, result_cache=self.cache)
+
+    def test_query_cache_hits(self) -> None:
+        with DBSession(self.eng) as sess:
+            first = sess.query(Human).filter(Human.age == 30).cache(ttl=60).all()
+            executions = len(sess.conn.executions)
+            second = sess.query(Human).filter(Human.age == 30).cache(ttl=60).all()
+            self.assertEqual(len(sess.conn.executions), executions)
+            self.assertIs(first[0], second[0])
+
+            sess.query(Human).filter(Human.age == 31).cache().all()
+            sess.query(Human).filter(Human.age == 30).all()
+            self.assertEqual(len(sess.conn.executions), executions + 2)
+
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+        snapshot = self.eng.metrics.snapshot()["counters"]
+        self.assertEqual(snapshot[("enorm_result_cache_hits_total", ())], 1.0)
+
+        with self.assertRaises(ValueError):
+            Query(Human).cache(ttl=0)
+
+    def test_query_cache_invalidation_by_update_query(self) -> None:
+        with DBSession(self.eng) as sess:
+            sess.query(Human).cache().all()
+            sess.query(Pet).join(Human).cache().all()
+            sess.query(Pet).cache().all()
+            self.assertEqual(len(self.cache), 3)
+            sess.query(Human).filter(Human.age == 30).update(age=31)
+            sess.save()
+            self.assertEqual(len(self.cache), 1)
+            self.assertEqual(self.cache.invalidations, 2)
+
+    def test_query_cache_invalidation_by_record_assignment(self) -> None:
+        with DBSession(self.eng) as sess:
+            record = sess.query(Human).cache().all()[0]
+            sq = sess.query(Human, Human.id).subquery()
+            sess.query(Pet).filter(Pet.owner_id.in_(sq)).cache().all()
+            record.age = 31
+            self.assertEqual(len(self.cache), 2)
+
+            sess.save()
+            self.assertEqual(len(self.cache), 0)
+
+    def test_query_cache_bypassed_within_writing_transaction(self) -> None:
+        with DBSession(self.eng) as sess:
+            sess.query(Human).cache().all()
+            sess.persistence_manager.insert(Human, ["full_name"], [("Jacques Trate",)])
+            self.assertEqual(len(self.cache), 0)
+            sess.query(Human).cache().all()
+            self.assertEqual(len(self.cache), 0)
+
+            sess.save()
+            sess.query(Human).cache().all()
+            self.assertEqual(len(self.cache), 1)
@@ -1,6 +1,18 @@
 import unittest
 
-from .defs import MYSQL_CONN_STR, ORACLE_CONN_STR, POSTGRESQL_CONN_STR, SQL_SERVER_CONN_STR, SQLITE_CONN_STR, FakeEngine
+from EnORM import DBSession
+from EnORM.db_engine import RoutingDBEngine
+
+from .defs import (
+    MYSQL_CONN_STR,
+    ORACLE_CONN_STR,
+    POSTGRESQL_CONN_STR,
+    SQL_SERVER_CONN_STR,
+    SQLITE_CONN_STR,
+    FakeEngine,
+    Human,
+    patch_pool_connect,
+)
 
 
 class TestEngine(unittest.TestCase):
@@ -33,3 +45,58 @@ class TestEngine(unittest.TestCase):
     def test_no_schema_conn_str(self) -> None:
         with self.assertRaises(ValueError):
             _ = FakeEngine("djksjjkjdskdjdj")
+
+
+class TestRoutingEngine(unittest.TestCase):
+    def setUp(self) -> None:
+        patch_pool_connect(self)
+        self.replica_conn_strs = [POSTGRESQL_CONN_STR + "?replica=1", POSTGRESQL_CONN_STR + "?replica=2"]
+        Human.alias = None
+
+    def test_routing_reads_to_replicas_round_robin(self) -> None:
+        engine = RoutingDBEngine(POSTGRESQL_CONN_STR, self.replica_conn_strs, pool_size=1)
+        with DBSession(engine) as session:
+            q = session.query(Human, Human.id, Human.full_name, Human.age)
+            for _ in range(3):
+                self.assertEqual(len(q.all()), 2)
+            self.assertEqual(session.conn.conn_str, POSTGRESQL_CONN_STR)
+            self.assertListEqual(session.conn.executions, [])
+        executions = [len(pool.pool.get_nowait().executions) for pool in engine.replica_pools]
+        self.assertListEqual(executions, [2, 1])
+
+    def test_routing_replica_metrics_labels(self) -> None:
+        engine = RoutingDBEngine(
+            POSTGRESQL_CONN_STR, self.replica_conn_strs, pool_size=1, metrics_labels={"db": "main"}
+        )
+        self.assertEqual(engine.connection_pool.metrics.labels, (("db", "main"),))
+        self.assertEqual(engine.replica_pools[1].metrics.labels, (("db", "main"), ("replica", "1")))
+        self.assertIs(engine.replica_pools[1].metrics.sink, engine.metrics.sink)
+
+    def test_routing_dispose(self) -> None:
+        engine = RoutingDBEngine(POSTGRESQL_CONN_STR, self.replica_conn_strs, pool_size=1)
+        with DBSession(engine) as session:
+            session.query(Human, Human.id, Human.full_name, Human.age).all()
+            conn = session.conn
+        replica_conn = engine.replica_pools[0].pool.queue[0]
+        engine.dispose()
+        self.assertFalse(conn.open)
+        self.assertFalse(replica_conn.open)
+        self.assertTrue(all(pool.closed.is_set() for pool in [engine.connection_pool, *engine.replica_pools]))
+
+    def test_routing_least_in_flight(self) -> None:
+        engine = RoutingDBEngine(POSTGRESQL_CONN_STR, self.replica_conn_strs, pool_size=1, balancing="least_in_flight")
+        busy = engine.replica_pools[0].acquire()
+        self.assertIs(engine.choose_replica(), engine.replica_pools[1])
+        engine.replica_pools[0].release(busy)
+        with self.assertRaises(ValueError):
+            _ = RoutingDBEngine(POSTGRESQL_CONN_STR, self.replica_conn_strs, pool_size=1, balancing="random")
+
+    def test_routing_read_your_writes(self) -> None:
+        engine = RoutingDBEngine(POSTGRESQL_CONN_STR, self.replica_conn_strs, pool_size=1, read_your_writes=60)
+        with DBSession(engine) as session:
+            with session.read_cursor() as cursor:
+                self.assertIsNot(cursor, session.cursor)
+            session.query(Human).filter(Human.id == 17).delete()
+            session.save()
+            with session.read_cursor() as cursor:
+                self.assertIs(cursor, session.cursor)
@@ -24,7 +24,8 @@ class TestFunctions(unittest.TestCase):
     def test_char_length(self) -> None:
         Human.alias = None
         long_names_query = Query(Human).filter(char_length(Human.full_name) > 15)
-        self.assertEqual(str(long_names_query), "SELECT humans.* FROM humans WHERE CHAR_LENGTH(humans.full_name) > 15")
+        self.assertEqual(str(long_names_query), "SELECT humans.* FROM humans WHERE CHAR_LENGTH(humans.full_name) > ?")
+        self.assertListEqual(long_names_query._params, [15])
         bare_ex = char_length("example")
         self.assertIsInstance(bare_ex, Scalar)
         self.assertEqual(bare_ex.compound_variable_name, "CHAR_LENGTH(example)")
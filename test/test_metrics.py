@@ -0,0 +1,74 @@
+import unittest
+
+from EnORM.db_engine import AbstractEngine
+from EnORM.metrics import Histogram, InMemorySink, Metrics, MetricsSink
+from EnORM.pool import ConnectionPool
+from EnORM.query import Query
+
+from .defs import POSTGRESQL_CONN_STR, FakeEngine, Human, patch_pool_connect
+
+
+class TestMetrics(unittest.TestCase):
+    def test_histogram(self) -> None:
+        hist = Histogram((0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 3.0):
+            hist.observe(value)
+        self.assertDictEqual(hist.as_dict(), {"buckets": {0.1: 1, 1.0: 3}, "sum": 4.05, "count": 4})
+
+    def test_pool_metrics(self) -> None:
+        patch_pool_connect(self)
+        metrics = Metrics()
+        pool = ConnectionPool(POSTGRESQL_CONN_STR, 1, max_overflow=1, metrics=metrics)
+        first, second = pool.acquire(), pool.acquire()
+        pool.release(first)
+        pool.release(second)
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot["counters"][("enorm_pool_connections_created_total", ())], 2)
+        self.assertEqual(snapshot["counters"][("enorm_pool_connections_closed_total", ())], 1)
+        self.assertEqual(snapshot["gauges"][("enorm_pool_connections_in_use", ())], 0)
+        self.assertEqual(snapshot["gauges"][("enorm_pool_connections_idle", ())], 1)
+        self.assertEqual(snapshot["histograms"][("enorm_pool_checkout_wait_seconds", ())]["count"], 2)
+        self.assertEqual(snapshot["histograms"][("enorm_pool_hold_seconds", ())]["count"], 2)
+
+    def test_statement_metrics(self) -> None:
+        engine = FakeEngine(POSTGRESQL_CONN_STR)
+        engine.metrics = Metrics(labels={"db": "main"})
+        AbstractEngine.active_instance = engine
+        Human.alias = None
+        q = Query(Human, Human.id, Human.full_name)
+        q.all()
+        labels = (("db", "main"), ("operation", "SELECT"), ("table", "humans"))
+        histograms = engine.metrics.snapshot()["histograms"]
+        self.assertEqual(histograms[("enorm_statement_execute_seconds", labels)]["count"], 1)
+        self.assertEqual(histograms[("enorm_statement_fetch_seconds", labels)]["count"], 1)
+        AbstractEngine.active_instance = None
+
+    def test_statement_labels(self) -> None:
+        self.assertEqual(
+            Metrics.statement_labels("UPDATE humans SET humans.age = ? WHERE humans.id IN (?, ?, ?)"),
+            (("operation", "UPDATE"), ("table", "humans")),
+        )
+        self.assertEqual(
+            Metrics.statement_labels("insert into pets (name) VALUES (?), (?)"),
+            (("operation", "INSERT"), ("table", "pets")),
+        )
+        self.assertEqual(Metrics.statement_labels("SELECT 1"), (("operation", "SELECT"), ("table", "")))
+
+    def test_prometheus_export(self) -> None:
+        metrics = Metrics(InMemorySink((0.5,)), labels={"pool": "main"})
+        metrics.connection_created()
+        metrics.checkout_wait(0.25)
+        self.assertEqual(
+            metrics.to_prometheus(),
+            "# TYPE enorm_pool_connections_created_total counter\n"
+            'enorm_pool_connections_created_total{pool="main"} 1.0\n'
+            "# TYPE enorm_pool_checkout_wait_seconds histogram\n"
+            'enorm_pool_checkout_wait_seconds_bucket{pool="main",le="0.5"} 1\n'
+            'enorm_pool_checkout_wait_seconds_bucket{pool="main",le="+Inf"} 1\n'
+            'enorm_pool_checkout_wait_seconds_sum{pool="main"} 0.25\n'
+            'enorm_pool_checkout_wait_seconds_count{pool="main"} 1\n',
+        )
+
+    def test_snapshot_requires_in_memory_sink(self) -> None:
+        with self.assertRaises(TypeError):
+            Metrics(MetricsSink()).snapshot()
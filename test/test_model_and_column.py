@@ -41,8 +41,9 @@ class TestModel(unittest.TestCase):
         self.assertIsInstance(PERSON.pets, Subquery)
         self.assertEqual(
             PERSON.pets.inner_sql,
-            "SELECT pets.* FROM pets JOIN humans ON pets.owner_id = humans.id WHERE pets.owner_id = %s" % PERSON.id,
+            "SELECT pets.* FROM pets JOIN humans ON pets.owner_id = humans.id WHERE pets.owner_id = ?",
         )
+        self.assertTupleEqual(PERSON.pets.params, (PERSON.id,))
 
     def test_model_nonexisting_compound_attr(self) -> None:
         with self.assertRaises(FieldNotExist):
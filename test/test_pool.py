@@ -0,0 +1,183 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+import pyodbc
+
+from EnORM.exceptions import PoolExhausted
+from EnORM.pool import ConnectionPool
+
+from .defs import POSTGRESQL_CONN_STR, patch_pool_connect
+
+
+class TestConnectionPool(unittest.TestCase):
+    def setUp(self) -> None:
+        self.connect = patch_pool_connect(self)
+
+    def test_pool_reuses_released_connection(self) -> None:
+        pool = ConnectionPool(POSTGRESQL_CONN_STR, 2)
+        conn = pool.acquire()
+        pool.release(conn)
+        self.assertIs(pool.acquire(), conn)
+        self.assertEqual(self.connect.call_count, 1)
+
+    def test_pool_bounded_by_size_and_overflow(self) -> None:
+        pool = ConnectionPool(POSTGRESQL_CONN_STR, 2, max_overflow=1, timeout=0.01)
+        conns = [pool.acquire() for _ in range(3)]
+        self.assertEqual(pool.size, 3)
+        with self.assertRaises(PoolExhausted):
+            pool.acquire()
+        self.assertEqual(self.connect.call_count, 3)
+        for conn in conns:
+            pool.release(conn)
+        self.assertEqual(pool.size, 2)
+        self.assertFalse(conns[2].open)
+
+    def test_pool_blocking_checkout(self) -> None:
+        pool = ConnectionPool(POSTGRESQL_CONN_STR, 1, max_overflow=0)
+        conn = pool.acquire()
+        timer = threading.Timer(0.05, pool.release, args=(conn,))
+        timer.start()
+        self.assertIs(pool.acquire(timeout=5), conn)
+        timer.join()
+
+    def test_pool_checkout_woken_by_freed_slot(self) -> None:
+        pool = ConnectionPool(POSTGRESQL_CONN_STR, 1, max_overflow=0)
+        conn = pool.acquire()
+        timer = threading.Timer(0.05, pool.invalidate, args=(conn,))
+        timer.start()
+        started_at = time.monotonic()
+        fresh = pool.acquire(timeout=5)
+        timer.join()
+        self.assertIsNot(fresh, conn)
+        self.assertLess(time.monotonic() - started_at, 1)
+        self.assertEqual(pool.size, 1)
+
+    def test_pool_failed_connect_frees_slot(self) -> None:
+        pool = ConnectionPool(POSTGRESQL_CONN_STR, 1, max_overflow=0)
+        self.connect.side_effect = RuntimeError
+        with self.assertRaises(RuntimeError):
+            pool.acquire()
+        self.assertEqual(pool.size, 0)
+
+    def test_pool_close_all(self) -> None:
+        pool = ConnectionPool(POSTGRESQL_CONN_STR, 2)
+        conns = [pool.acquire() for _ in range(2)]
+        for conn in conns:
+            pool.release(conn)
+        pool.close_all()
+        self.assertEqual(pool.size, 0)
+        self.assertTrue(all(not conn.open for conn in conns))
+
+    def test_pool_pre_ping_replaces_dead_connection(self) -> None:
+        pool = ConnectionPool(POSTGRESQL_CONN_STR, 1, pre_ping=True)
+        dead = pool.acquire()
+        pool.release(dead)
+        with mock.patch.object(dead, "cursor", side_effect=pyodbc.Error):
+            conn = pool.acquire()
+        self.assertIsNot(conn, dead)
+        self.assertFalse(dead.open)
+        self.assertEqual(pool.size, 1)
+
+    def test_pool_recycles_old_connection(self) -> None:
+        pool = ConnectionPool(POSTGRESQL_CONN_STR, 1, recycle_after=60)
+        old = pool.acquire()
+        pool.release(old)
+        pool.created_at[id(old)] -= 120
+        self.assertIsNot(pool.acquire(), old)
+        self.assertFalse(old.open)
+
+    def test_pool_trims_idle_connections(self) -> None:
+        pool = ConnectionPool(POSTGRESQL_CONN_STR, 2, idle_timeout=60)
+        stale, fresh = pool.acquire(), pool.acquire()
+        pool.release(stale)
+        pool.release(fresh)
+        pool.idle_since[id(stale)] -= 120
+        self.assertEqual(pool.trim_idle(), 1)
+        self.assertFalse(stale.open)
+        self.assertIs(pool.acquire(), fresh)
+
+    def test_pool_trims_in_background(self) -> None:
+        pool = ConnectionPool(POSTGRESQL_CONN_STR, 1, idle_timeout=0.01, trim_interval=0.01)
+        conn = pool.acquire()
+        pool.release(conn)
+        for _ in range(500):
+            if not conn.open:
+                break
+            time.sleep(0.01)
+        self.assertFalse(conn.open)
+        self.assertEqual(pool.size, 0)
+        pool.close_all()
+        self.assertTrue(pool.closed.is_set())
+
+    def test_pool_is_disconnect(self) -> None:
+        try:
+            try:
+                raise pyodbc.OperationalError
+            except pyodbc.Error:
+                raise RuntimeError
+        except RuntimeError as e:
+            self.assertTrue(ConnectionPool.is_disconnect(e))
+        self.assertTrue(ConnectionPool.is_disconnect(pyodbc.InterfaceError()))
+        self.assertFalse(ConnectionPool.is_disconnect(pyodbc.ProgrammingError()))
+        self.assertFalse(ConnectionPool.is_disconnect(None))
+
+    def test_pool_warm_up(self) -> None:
+        pool = ConnectionPool(POSTGRESQL_CONN_STR, 4, min_size=3)
+        self.assertFalse(pool.ready.is_set())
+        pool.warm_up()
+        self.assertTrue(pool.ready.is_set())
+        self.assertEqual(pool.size, 3)
+        self.assertEqual(pool.pool.qsize(), 3)
+        self.assertEqual(self.connect.call_count, 3)
+
+    def test_pool_warm_up_in_background(self) -> None:
+        pool = ConnectionPool(POSTGRESQL_CONN_STR, 2, min_size=2)
+        pool.warm_up(background=True)
+        self.assertTrue(pool.wait_ready(5))
+        self.assertIsNone(pool.warm_up_error)
+        self.assertEqual(pool.pool.qsize(), 2)
+
+    def test_pool_warm_up_failure(self) -> None:
+        pool = ConnectionPool(POSTGRESQL_CONN_STR, 2, min_size=2)
+        self.connect.side_effect = pyodbc.OperationalError
+        with self.assertRaises(pyodbc.OperationalError):
+            pool.warm_up()
+        self.assertTrue(pool.ready.is_set())
+        self.assertEqual(pool.size, 0)
+
+        pool.warm_up(background=True)
+        self.assertFalse(pool.wait_ready(5))
+        self.assertIsInstance(pool.warm_up_error, pyodbc.OperationalError)
+
+    def test_pool_replenishes_min_size_after_invalidation(self) -> None:
+        pool = ConnectionPool(POSTGRESQL_CONN_STR, 2, min_size=1)
+        pool.warm_up()
+        broken = pool.acquire()
+        pool.invalidate(broken)
+        for _ in range(500):
+            if pool.pool.qsize() == 1 and not pool.replenishing:
+                break
+            time.sleep(0.01)
+        self.assertEqual(pool.pool.qsize(), 1)
+        self.assertIsNone(pool.replenish_error)
+        self.assertIsNot(pool.acquire(), broken)
+
+    def test_pool_trim_keeps_min_size(self) -> None:
+        pool = ConnectionPool(POSTGRESQL_CONN_STR, 2, min_size=1, idle_timeout=60)
+        pool.warm_up()
+        stale = pool.acquire()
+        pool.release(stale)
+        pool.idle_since[id(stale)] -= 120
+        self.assertEqual(pool.trim_idle(), 1)
+        self.assertEqual(pool.pool.qsize(), 1)
+        self.assertIsNot(pool.acquire(), stale)
+
+    def test_pool_invalid_args(self) -> None:
+        with self.assertRaises(ValueError):
+            _ = ConnectionPool(POSTGRESQL_CONN_STR, 0)
+        with self.assertRaises(ValueError):
+            _ = ConnectionPool(POSTGRESQL_CONN_STR, 1, max_overflow=-1)
+        with self.assertRaises(ValueError):
+            _ = ConnectionPool(POSTGRESQL_CONN_STR, 1, min_size=2)
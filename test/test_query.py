@@ -1,11 +1,16 @@
+import importlib.util
 import unittest
+from array import array
+from typing import Any, List
+from unittest import mock
 
 from EnORM.db_engine import AbstractEngine
 from EnORM.exceptions import EntityError, FieldNotExist, MethodChainingError
 from EnORM.functions import count
-from EnORM.query import Query, QuerySet, Record, Subquery
+from EnORM.loading import joined, selectin
+from EnORM.query import Page, Query, QueryBuilder, QuerySet, Record, Subquery
 
-from .defs import POSTGRESQL_CONN_STR, FakeEngine, Human, Pet
+from .defs import POSTGRESQL_CONN_STR, SQL_SERVER_CONN_STR, SQLITE_CONN_STR, FakeCursor, FakeEngine, Human, Pet
 
 
 class TestQuery(unittest.TestCase):
@@ -51,12 +56,56 @@ class TestQuery(unittest.TestCase):
     def test_query_filter(self) -> None:
         Human.alias = None
         q = Query(Human, Human.full_name).filter(Human.age == 44, Human.id > 15)
-        self.assertEqual(str(q), "SELECT humans.full_name FROM humans WHERE humans.age = 44 AND humans.id > 15")
+        self.assertEqual(str(q), "SELECT humans.full_name FROM humans WHERE humans.age = ? AND humans.id > ?")
+        self.assertListEqual(q._params, [44, 15])
 
     def test_query_filter_by(self) -> None:
         Human.alias = None
         q = Query(Human, Human.full_name).filter_by(age=24, gender="M")
-        self.assertEqual(str(q), "SELECT humans.full_name FROM humans WHERE humans.age = 24 AND humans.gender = M")
+        self.assertEqual(str(q), "SELECT humans.full_name FROM humans WHERE humans.age = ? AND humans.gender = ?")
+        self.assertListEqual(q._params, [24, "M"])
+        with self.assertRaises(FieldNotExist):
+            Query(Human).filter_by(fullname="Jacques Trate")
+
+    def test_query_compile_cache(self) -> None:
+        Human.alias = None
+        QueryBuilder.compile.cache_clear()
+        for age in (20, 30, 40):
+            q = Query(Human, Human.id).filter(Human.age > age)
+            self.assertEqual(str(q), "SELECT humans.id FROM humans WHERE humans.age > ?")
+        self.assertEqual(QueryBuilder.cache_info().misses, 1)
+        self.assertEqual(QueryBuilder.cache_info().hits, 2)
+
+        with mock.patch.object(QueryBuilder, "parse_item", wraps=QueryBuilder.parse_item) as parse_item:
+            self.assertEqual(str(q.limit(5)), "SELECT humans.id FROM humans WHERE humans.age > ? LIMIT 5")
+            parse_item.assert_not_called()
+        self.assertEqual(QueryBuilder.cache_info().misses, 2)
+
+        q = Query(Human, Human.id).filter(Human.id.in_(list(range(1000))), Human.age > 20)
+        self.assertTrue(all(type(val) is str for _, vals in q.builder.shape for val in vals))
+        self.assertEqual(len(q._params), 1001)
+
+    def test_query_bind_params(self) -> None:
+        engine = FakeEngine(POSTGRESQL_CONN_STR)
+        AbstractEngine.active_instance = engine
+        Human.alias = None
+        Pet.name.alias = None
+        sq = Query(Human, Human.id, Human.full_name).filter(Human.age > 20).subquery()
+        q = (
+            Query(Pet, Pet.name)
+            .join(sq, sq.full_name == Pet.name, Pet.age < 3)
+            .filter(Pet.name.in_(["Rex", "Sakura"]), Pet.owner_id.not_in(sq))
+        )
+        self.assertEqual(
+            str(q),
+            "SELECT pets.name FROM pets JOIN (SELECT humans.id, humans.full_name FROM humans WHERE humans.age > ?) AS "
+            "%s ON %s.full_name = pets.name AND pets.age < ? WHERE pets.name IN (?, ?) AND pets.owner_id NOT IN "
+            "(SELECT humans.id, humans.full_name FROM humans WHERE humans.age > ?)" % (sq.view_name, sq.view_name),
+        )
+        q.all()
+        self.assertListEqual(engine.conn.executions[-1], [str(q), 20, 3, "Rex", "Sakura", 20])
+        self.assertEqual(str(Query(Human).filter(Human.age == 41)), str(Query(Human).filter(Human.age == 7)))
+        AbstractEngine.active_instance = None
 
     def test_query_group_by(self) -> None:
         Human.alias = None
@@ -73,7 +122,8 @@ class TestQuery(unittest.TestCase):
     def test_query_having(self) -> None:
         Human.alias = None
         q = Query(Human, Human.id, count(Human.age).label("age_count")).having(count(Human.age) > 5)
-        self.assertEqual(str(q), "SELECT humans.id, COUNT(humans.age) AS age_count FROM humans HAVING humans.age > 5")
+        self.assertEqual(str(q), "SELECT humans.id, COUNT(humans.age) AS age_count FROM humans HAVING humans.age > ?")
+        self.assertListEqual(q._params, [5])
 
     def test_query_order_by_labelless(self) -> None:
         Human.alias = None
@@ -102,6 +152,71 @@ class TestQuery(unittest.TestCase):
         q = Query(Human, Human.id, Human.full_name).slice(12, 16)
         self.assertEqual(str(q), "SELECT humans.id, humans.full_name FROM humans LIMIT 4 OFFSET 12")
 
+    def test_query_get_many(self) -> None:
+        engine = FakeEngine(POSTGRESQL_CONN_STR)
+        AbstractEngine.active_instance = engine
+        Human.alias = None
+        q = Query(Human).filter(Human.age == 30).order_by(Human.age)
+        with mock.patch("EnORM.query.in_chunk_size", return_value=2) as chunk_size:
+            found = q.get_many([34, 99, 17, 34], concurrency=4)
+        chunk_size.assert_called_once_with("postgresql", 1)
+        self.assertListEqual([rec.id for rec in found], [34, 17, 34])
+        self.assertListEqual(found.missing, [99])
+        self.assertListEqual(
+            engine.conn.executions,
+            [
+                ["SELECT humans.* FROM humans WHERE humans.age = ? AND humans.id IN (?, ?)", 30, 34, 99],
+                ["SELECT humans.* FROM humans WHERE humans.age = ? AND humans.id IN (?)", 30, 17],
+            ],
+        )
+        self.assertEqual(str(q), "SELECT humans.* FROM humans WHERE humans.age = ? ORDER BY humans.age")
+
+        with self.assertRaises(MethodChainingError):
+            Query(Human).limit(5).get_many([17])
+        with self.assertRaises(EntityError):
+            Query(Pet).get_many(["Rex"])
+        AbstractEngine.active_instance = None
+
+    def test_query_paginate_by(self) -> None:
+        engine = FakeEngine(POSTGRESQL_CONN_STR)
+        AbstractEngine.active_instance = engine
+        Human.alias = None
+        q = Query(Human).filter(Human.age == 30)
+        page = q.paginate_by(Human.id, page_size=2)
+        self.assertListEqual([rec.id for rec in page], [17, 34])
+        self.assertListEqual(Page.decode_cursor(page.next_cursor), [34])
+        self.assertListEqual(
+            engine.conn.executions[-1],
+            ["SELECT humans.* FROM humans WHERE humans.age = ? ORDER BY humans.id LIMIT 2", 30],
+        )
+
+        page = q.paginate_by(Human.id, cursor=page.next_cursor, page_size=2)
+        self.assertListEqual(
+            engine.conn.executions[-1],
+            ["SELECT humans.* FROM humans WHERE humans.age = ? AND humans.id > ? ORDER BY humans.id LIMIT 2", 30, 34],
+        )
+        self.assertEqual(str(q), "SELECT humans.* FROM humans WHERE humans.age = ?")
+
+        page = q.paginate_by(Human.age, Human.id, after=(30, 34), page_size=5, descending=True)
+        self.assertIsNone(page.next_cursor)
+        self.assertListEqual(
+            engine.conn.executions[-1],
+            [
+                "SELECT humans.* FROM humans WHERE humans.age = ? AND (humans.age < ? OR (humans.age = ? AND "
+                "humans.id < ?)) ORDER BY humans.age DESC, humans.id DESC LIMIT 5",
+                30,
+                30,
+                30,
+                34,
+            ],
+        )
+
+        with self.assertRaises(ValueError):
+            q.paginate_by(Human.id, after=34, cursor=Page.encode_cursor([34]))
+        with self.assertRaises(MethodChainingError):
+            q.slice(0, 10).paginate_by(Human.id)
+        AbstractEngine.active_instance = None
+
     def test_query_desc(self) -> None:
         Human.alias = None
         with self.assertRaises(MethodChainingError):
@@ -126,7 +241,8 @@ class TestQuery(unittest.TestCase):
         Human.alias = None
         q = Query(Human, Human.id, Human.full_name).filter(Human.age == 30)
         q.update(age=20)
-        self.assertEqual(str(q), "UPDATE humans SET humans.age = 20 WHERE humans.age = 30")
+        self.assertEqual(str(q), "UPDATE humans SET humans.age = ? WHERE humans.age = ?")
+        self.assertListEqual(q._params, [20, 30])
 
     def test_query_update_indirect(self) -> None:
         AbstractEngine.active_instance = FakeEngine(POSTGRESQL_CONN_STR)
@@ -136,23 +252,129 @@ class TestQuery(unittest.TestCase):
         result.age += 1
         self.assertEqual(
             str(q),
-            "UPDATE humans SET humans.age = 31 WHERE humans.age = 30 AND humans.id = 17 AND "
-            "humans.full_name = Jacques Trate AND humans.age = 30",
+            "UPDATE humans SET humans.age = ? WHERE humans.age = ? AND humans.id = ? AND "
+            "humans.full_name = ? AND humans.age = ?",
         )
+        self.assertListEqual(q._params, [31, 30, 17, "Jacques Trate", 30])
+        AbstractEngine.active_instance = None
+
+    def test_query_iter(self) -> None:
+        engine = FakeEngine(POSTGRESQL_CONN_STR)
+        AbstractEngine.active_instance = engine
+        Human.alias = None
+        q = Query(Human, Human.id, Human.full_name, Human.age)
+        cursors = self.track_cursors(engine)
+        records = list(q.iter(batch_size=1))
+        self.assertListEqual([rec.id for rec in records], [17, 34])
+        self.assertFalse(cursors[-1].open)
+
+        for _ in q.yield_per(5):
+            break
+        self.assertEqual(len(cursors), 2)
+        self.assertFalse(cursors[-1].open)
+        self.assertEqual(q.stream_batch_size, 5)
+        self.assertTrue(engine.cursor.open)
+        with self.assertRaises(ValueError):
+            q.yield_per(0)
+        AbstractEngine.active_instance = None
+
+    def test_query_iter_closes_cursor_on_error(self) -> None:
+        engine = FakeEngine(POSTGRESQL_CONN_STR)
+        AbstractEngine.active_instance = engine
+        Human.alias = None
+        cursors = self.track_cursors(engine)
+        with self.assertRaises(RuntimeError):
+            for _ in Query(Human).iter():
+                raise RuntimeError
+        self.assertFalse(cursors[-1].open)
+        AbstractEngine.active_instance = None
+
+    def track_cursors(self, engine: FakeEngine) -> List[FakeCursor]:
+        cursors = []
+
+        def new_cursor() -> FakeCursor:
+            cursors.append(FakeCursor(engine.conn))
+            return cursors[-1]
+
+        patcher = mock.patch.object(engine.conn, "cursor", side_effect=new_cursor)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return cursors
+
+    def test_query_to_columns(self) -> None:
+        engine = FakeEngine(POSTGRESQL_CONN_STR)
+        AbstractEngine.active_instance = engine
+        Human.alias = None
+        columns = Query(Human).to_columns(batch_size=1)
+        self.assertDictEqual(
+            columns,
+            {"id": array("q", [17, 34]), "full_name": ["Jacques Trate", "Joanna Males"], "age": array("q", [30, 30])},
+        )
+        with mock.patch.object(FakeCursor, "fetchall", return_value=[(1, "Nima Bavari", None), (2, "Jo", 41)]):
+            columns = Query(Human).to_columns()
+        self.assertListEqual(columns["age"], [None, 41])
+        AbstractEngine.active_instance = None
+
+    @unittest.skipIf(importlib.util.find_spec("numpy") is None, "NumPy is not installed.")
+    def test_query_to_numpy(self) -> None:
+        AbstractEngine.active_instance = FakeEngine(POSTGRESQL_CONN_STR)
+        Human.alias = None
+        columns = Query(Human).to_numpy()
+        self.assertEqual(columns["id"].dtype.name, "int64")
+        self.assertListEqual(columns["id"].tolist(), [17, 34])
+        self.assertEqual(columns["full_name"].dtype.name, "object")
         AbstractEngine.active_instance = None
 
     def test_query_delete(self) -> None:
         Human.alias = None
         q = Query(Human, Human.id, Human.full_name).filter(Human.age == 30)
         q.delete()
-        self.assertEqual(str(q), "DELETE FROM humans WHERE humans.age = 30")
+        self.assertEqual(str(q), "DELETE FROM humans WHERE humans.age = ?")
+        self.assertListEqual(q._params, [30])
 
     def test_query_execs(self) -> None:
-        AbstractEngine.active_instance = FakeEngine(POSTGRESQL_CONN_STR)
+        engine = FakeEngine(POSTGRESQL_CONN_STR)
+        AbstractEngine.active_instance = engine
         Human.alias = None
-        q = Query(Human, Human.id, Human.full_name).filter(Human.age == 30)
-        self.assertEqual(q.count(), 2)
-        self.assertTrue(q.exists())
+        q = Query(Human, Human.id, Human.full_name).filter(Human.age == 30).order_by(Human.id)
+        with mock.patch.object(FakeCursor, "fetchall", return_value=[(2,)]):
+            self.assertEqual(q.count(), 2)
+            self.assertListEqual(
+                engine.conn.executions[-1],
+                ["SELECT COUNT(*) FROM (SELECT 1 FROM humans WHERE humans.age = ?) count_subquery", 30],
+            )
+            self.assertTrue(q.exists())
+            self.assertListEqual(
+                engine.conn.executions[-1], ["SELECT EXISTS (SELECT 1 FROM humans WHERE humans.age = ?)", 30]
+            )
+        AbstractEngine.active_instance = None
+
+    def test_query_count_distinct_and_sliced(self) -> None:
+        engine = FakeEngine(POSTGRESQL_CONN_STR)
+        AbstractEngine.active_instance = engine
+        Human.alias = None
+        Human.age.alias = None
+        with mock.patch.object(FakeCursor, "fetchall", return_value=[(12,)]):
+            self.assertEqual(Query(Human.age).distinct().count(), 12)
+            self.assertEqual(
+                engine.conn.executions[-1][0],
+                "SELECT COUNT(*) FROM (SELECT DISTINCT humans.age FROM humans) count_subquery",
+            )
+            self.assertEqual(Query(Human).slice(10, 20).count(), 2)
+            self.assertEqual(Query(Human).limit(5).count(), 5)
+        AbstractEngine.active_instance = None
+
+    def test_query_exists_dialects(self) -> None:
+        engine = FakeEngine(SQL_SERVER_CONN_STR)
+        AbstractEngine.active_instance = engine
+        Human.alias = None
+        with mock.patch.object(FakeCursor, "fetchall", return_value=[(0,)]):
+            self.assertFalse(Query(Human).exists())
+        self.assertEqual(
+            engine.conn.executions[-1][0], "SELECT CASE WHEN EXISTS (SELECT 1 FROM humans) THEN 1 ELSE 0 END"
+        )
+        with mock.patch.object(FakeCursor, "fetchall", return_value=[]):
+            self.assertIsNone(Query(Human).first())
         AbstractEngine.active_instance = None
 
     def test_query_record_identity(self) -> None:
@@ -164,6 +386,24 @@ class TestQuery(unittest.TestCase):
         self.assertDictEqual(res.dct, {"id": 17, "full_name": "Jacques Trate", "age": 30})
         self.assertEqual(res.query, q)
 
+    def test_query_record_shared_columns(self) -> None:
+        record_cls = Record.for_columns(("id", "full_name", "age"))
+        self.assertIs(Record.for_columns(("id", "full_name", "age")), record_cls)
+        self.assertDictEqual(record_cls.columns, {"id": 0, "full_name": 1, "age": 2})
+        res = record_cls((17, "Jacques Trate", 30), Query(Human))
+        with self.assertRaises(FieldNotExist):
+            _ = res.__dict__
+        self.assertEqual(res.full_name, "Jacques Trate")
+        self.assertDictEqual(res.dct, {"id": 17, "full_name": "Jacques Trate", "age": 30})
+
+    def test_query_record_reserved_column_names(self) -> None:
+        q = Query(Human)
+        res = Record.for_columns(("id", "query", "columns"))((17, "who", "name"), q)
+        self.assertIs(res.query, q)
+        self.assertDictEqual(res.columns, {"id": 0, "query": 1, "columns": 2})
+        self.assertEqual(res.id, 17)
+        self.assertDictEqual(res.dct, {"id": 17, "query": "who", "columns": "name"})
+
     def test_query_record_nonexistent_attr(self) -> None:
         AbstractEngine.active_instance = FakeEngine(POSTGRESQL_CONN_STR)
         Human.alias = None
@@ -185,8 +425,9 @@ class TestQuery(unittest.TestCase):
         res = Query(Human).filter(Human.age == 30).first()
         self.assertEqual(
             res.pets.inner_sql,
-            "SELECT pets.* FROM pets JOIN humans ON pets.owner_id = humans.id WHERE pets.owner_id = 17",
+            "SELECT pets.* FROM pets JOIN humans ON pets.owner_id = humans.id WHERE pets.owner_id = ?",
         )
+        self.assertTupleEqual(res.pets.params, (17,))
         AbstractEngine.active_instance = None
 
     def test_query_record_reverse_name_not_row(self) -> None:
@@ -197,6 +438,71 @@ class TestQuery(unittest.TestCase):
             _ = res.pets
         AbstractEngine.active_instance = None
 
+    def serve_pets(self) -> None:
+        pets = [("Rex", 3, 17), ("Sakura", 5, 34), ("Tom", 2, 17)]
+
+        def execute(cursor: FakeCursor, sql: str, *args: Any) -> None:
+            cursor.connection.executions.append([sql, *args])
+            if sql.startswith("SELECT pets.*"):
+                cursor.description = (("name", "col"), ("age", "col"), ("owner_id", "col"))
+                cursor.rows = [pet for pet in pets if " IN " not in sql or pet[2] in args]
+            else:
+                cursor.description = (("id", "col"), ("full_name", "col"), ("age", "col"))
+                cursor.rows = [(17, "Jacques Trate", 30), (34, "Joanna Males", 30)]
+
+        for name, new in (("execute", execute), ("fetchall", lambda cursor: cursor.rows)):
+            patcher = mock.patch.object(FakeCursor, name, new)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_query_options_selectin(self) -> None:
+        engine = FakeEngine(SQLITE_CONN_STR)
+        AbstractEngine.active_instance = engine
+        Human.alias = None
+        self.serve_pets()
+        with mock.patch("EnORM.query.in_chunk_size", return_value=1):
+            jacques, joanna = Query(Human).filter(Human.age == 30).options(selectin("pets")).all()
+        self.assertListEqual([pet.name for pet in jacques.pets], ["Rex", "Tom"])
+        self.assertListEqual([pet.name for pet in joanna.pets], ["Sakura"])
+        self.assertListEqual(
+            engine.conn.executions,
+            [
+                ["SELECT humans.* FROM humans WHERE humans.age = ?", 30],
+                ["SELECT pets.* FROM pets WHERE pets.owner_id IN (?)", 17],
+                ["SELECT pets.* FROM pets WHERE pets.owner_id IN (?)", 34],
+            ],
+        )
+
+        with self.assertRaises(FieldNotExist):
+            Query(Human).options(selectin("cars")).all()
+        with self.assertRaises(EntityError):
+            Query(Human.full_name).options(selectin("pets")).all()
+        AbstractEngine.active_instance = None
+
+    def test_query_options_joined(self) -> None:
+        engine = FakeEngine(SQLITE_CONN_STR)
+        AbstractEngine.active_instance = engine
+        Human.alias = None
+        self.serve_pets()
+        jacques, joanna = Query(Human).filter(Human.age == 30).order_by(Human.id).options(joined("pets")).all()
+        self.assertListEqual([pet.name for pet in jacques.pets], ["Rex", "Tom"])
+        self.assertListEqual([pet.name for pet in joanna.pets], ["Sakura"])
+        sql, *params = engine.conn.executions[-1]
+        self.assertRegex(
+            sql,
+            r"^SELECT pets\.\* FROM pets JOIN \(SELECT DISTINCT humans\.id FROM humans WHERE humans\.age = \?\) "
+            r"AS (anon_\d+) ON pets\.owner_id = \1\.id$",
+        )
+        self.assertListEqual(params, [30])
+        self.assertEqual(len(engine.conn.executions), 2)
+
+        jacques, _ = Query(Human).order_by(Human.age).limit(2).options(joined("pets")).all()
+        self.assertListEqual([pet.name for pet in jacques.pets], ["Rex", "Tom"])
+        sql, *params = engine.conn.executions[-1]
+        self.assertEqual(sql, "SELECT pets.* FROM pets WHERE pets.owner_id IN (?, ?)")
+        self.assertListEqual(params, [17, 34])
+        AbstractEngine.active_instance = None
+
     def test_query_queryset(self) -> None:
         AbstractEngine.active_instance = FakeEngine(POSTGRESQL_CONN_STR)
         Human.alias = None
@@ -1,9 +1,28 @@
+import threading
 import unittest
+from typing import Any
+from unittest import mock
 
-from EnORM import Column, DBSession, Model, Serial, String
+import pyodbc
+
+from EnORM import Column, DBEngine, DBSession, Model, ScopedSession, Serial, String
+from EnORM.db_engine import AbstractEngine
+from EnORM.exceptions import EntityError, MethodChainingError, QueryFormatError
 from EnORM.query import Query
 
-from .defs import MYSQL_CONN_STR, POSTGRESQL_CONN_STR, FakeEngine
+from .defs import (
+    MYSQL_CONN_STR,
+    ORACLE_CONN_STR,
+    POSTGRESQL_CONN_STR,
+    SQL_SERVER_CONN_STR,
+    SQLITE_CONN_STR,
+    FakeConnection,
+    FakeCursor,
+    FakeEngine,
+    Human,
+    Pet,
+    patch_pool_connect,
+)
 
 
 class Order(Model):
@@ -19,26 +38,52 @@ class TestDBSession(unittest.TestCase):
         self.e2 = FakeEngine(MYSQL_CONN_STR)
         self.sess1 = DBSession(self.e1)
         self.sess2 = DBSession(self.e2)
+        self.addCleanup(AbstractEngine.active_session.set, None)
 
     def test_pending_model_definitions_without_session(self) -> None:
         self.assertListEqual(Model.model_definition_sqls, [])
 
-    def test_session_singularity(self) -> None:
-        self.assertIs(self.sess1, self.sess2)
-        self.assertIs(DBSession._instance, self.sess1)
-        self.assertIs(DBSession._instance, self.sess2)
+    def test_session_plurality(self) -> None:
+        self.assertIsNot(self.sess1, self.sess2)
+        self.assertIs(self.sess1.conn, self.e1.conn)
+        self.assertIs(self.sess2.conn, self.e2.conn)
+        self.assertIsNot(self.sess1.cursor, self.sess2.cursor)
+
+    def test_session_active_session(self) -> None:
+        self.assertIs(AbstractEngine.get_active_session(), self.sess2)
+        with DBSession(self.e1) as sess:
+            self.assertIs(AbstractEngine.get_active_session(), sess)
+        self.assertIs(AbstractEngine.get_active_session(), self.sess2)
 
-    def test_session_engine_active_instance(self) -> None:
-        self.assertIs(FakeEngine.active_instance, self.e2)
+    def test_session_active_session_per_thread(self) -> None:
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(AbstractEngine.active_session.get()))
+        thread.start()
+        thread.join()
+        self.assertListEqual(seen, [None])
+
+    def test_scoped_session(self) -> None:
+        scoped = ScopedSession(self.e1)
+        sess = scoped()
+        self.assertIs(scoped(), sess)
+        others = []
+        thread = threading.Thread(target=lambda: others.append(scoped()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(others[0], sess)
+        scoped.remove()
+        self.assertIsNone(sess.conn)
+        self.assertIsNot(scoped(), sess)
 
     def test_pending_model_definitions_with_session(self) -> None:
-        self.assertListEqual(self.sess1.engine.conn.executions, [])
+        self.assertListEqual(self.sess1.conn.executions, [])
 
     def test_session_context_manager_exit(self) -> None:
-        with DBSession(self.e2) as _:
+        with DBSession(self.e2) as sess:
             pass
-        self.assertFalse(self.e2.cursor.open)
+        self.assertFalse(sess.cursor.open)
         self.assertFalse(self.e2.conn.open)
+        self.assertIsNone(sess.conn)
 
     def test_session_add_and_commit_adds(self) -> None:
         with DBSession(self.e2) as sess:
@@ -47,16 +92,246 @@ class TestDBSession(unittest.TestCase):
             self.assertListEqual(sess.persistence_manager.queue, [order])
             self.assertListEqual(list(sess), [order])
             sess.persistence_manager.auto_commit_adds()
-            self.assertListEqual(sess.engine.conn.executions, [])
+            self.assertListEqual(sess.conn.executions, [])
             self.assertListEqual(sess.query_executor.accumulator, [])
 
+    def test_session_batched_adds(self) -> None:
+        with DBSession(FakeEngine(SQL_SERVER_CONN_STR), insert_batch_size=2) as sess:
+            objs = [
+                Pet(name="Sakura", age=5),
+                Human(full_name="Jacques Trate"),
+                Pet(name="Bobby", age=2),
+                Human(full_name="Joanna Males"),
+                Pet(name="Rex", age=9),
+                Human(full_name="Nima Bavari", age=32),
+            ]
+            for obj in objs:
+                sess.add(obj)
+            sess.cursor.fast_executemany = False
+            with mock.patch.object(sess.cursor, "executemany") as executemany:
+                sess.persistence_manager.auto_commit_adds()
+            self.assertTrue(sess.cursor.fast_executemany)
+            self.assertListEqual(
+                executemany.call_args_list,
+                [
+                    mock.call(objs[1].sql, [("Jacques Trate",), ("Joanna Males",)]),
+                    mock.call(objs[5].sql, [("Nima Bavari", 32)]),
+                    mock.call(objs[0].sql, [("Sakura", 5), ("Bobby", 2)]),
+                    mock.call(objs[0].sql, [("Rex", 9)]),
+                ],
+            )
+            self.assertListEqual(sess.persistence_manager.queue, [])
+
+    def test_session_multi_values_adds(self) -> None:
+        with DBSession(FakeEngine(SQL_SERVER_CONN_STR), insert_mode="multi_values") as sess:
+            objs = [Pet(name="Sakura", age=5), Pet(name="Bobby", age=2), Pet(name="Rex", age=9)]
+            for obj in objs:
+                sess.add(obj)
+            with mock.patch.object(sess.cursor, "execute") as execute:
+                sess.persistence_manager.auto_commit_adds()
+            self.assertListEqual(
+                execute.call_args_list,
+                [
+                    mock.call(
+                        "INSERT INTO pets (name, age) VALUES (?, ?), (?, ?), (?, ?);", "Sakura", 5, "Bobby", 2, "Rex", 9
+                    )
+                ],
+            )
+            self.assertEqual(sess.persistence_manager.chunk_size(2), 1000)
+            self.assertEqual(sess.persistence_manager.chunk_size(3), 700)
+
+        with DBSession(FakeEngine(SQLITE_CONN_STR), insert_batch_size=100, insert_mode="multi_values") as sess:
+            self.assertEqual(sess.persistence_manager.chunk_size(2), 100)
+            self.assertEqual(sess.persistence_manager.chunk_size(20), 49)
+
+    def test_session_multi_values_fallback(self) -> None:
+        with DBSession(FakeEngine(ORACLE_CONN_STR), insert_mode="multi_values") as sess:
+            obj = Pet(name="Sakura", age=5)
+            sess.add(obj)
+            with mock.patch.object(sess.cursor, "executemany") as executemany:
+                sess.persistence_manager.auto_commit_adds()
+            executemany.assert_called_once_with(obj.sql, [("Sakura", 5)])
+
+        with self.assertRaises(ValueError):
+            DBSession(FakeEngine(SQL_SERVER_CONN_STR), insert_mode="bulk")
+
+    def pooled_engine(self) -> DBEngine:
+        patch_pool_connect(self)
+        Human.alias = None
+        return DBEngine(POSTGRESQL_CONN_STR, pool_size=1)
+
+    def test_session_identity_map(self) -> None:
+        with DBSession(self.pooled_engine()) as sess:
+            first = sess.query(Human).all()
+            second = sess.query(Human).filter(Human.age == 30).all()
+            self.assertIs(first[0], second[0])
+            self.assertIs(first[1], second[1])
+            self.assertEqual(len(sess.identity_map), 2)
+
+            with mock.patch.object(sess.cursor, "execute") as execute:
+                self.assertIs(sess.query(Human).get(id=34), first[1])
+            execute.assert_not_called()
+
+            partial = sess.query(Human.id, Human.full_name).all()
+            self.assertIsNot(partial[0], first[0])
+        self.assertEqual(len(sess.identity_map), 0)
+
+    def test_session_identity_map_after_query_writes(self) -> None:
+        with DBSession(self.pooled_engine()) as sess:
+            sess.query(Human).all()
+            sess.query(Human).filter(Human.id == 17).update(age=99)
+            sess.save()
+            self.assertIsNone(sess.identity_map.get(Human, 17))
+
+            with mock.patch.object(FakeCursor, "fetchall", return_value=[(17, "Jacques Trate", 99)]):
+                fresh = sess.query(Human).get(id=17)
+            self.assertEqual(fresh.age, 99)
+            with mock.patch.object(FakeCursor, "fetchall", return_value=[(17, "Jacques Trate", 98)]):
+                self.assertIs(sess.query(Human).all()[0], fresh)
+            self.assertEqual(fresh.age, 98)
+
+            fresh.age = 97
+            with mock.patch.object(FakeCursor, "fetchall", return_value=[(17, "Jacques Trate", 98)]):
+                sess.query(Human).all()
+            self.assertEqual(fresh.age, 97)
+
+            sess.query(Human).filter(Human.id == 17).delete()
+            sess.save()
+            self.assertEqual(len(sess.identity_map), 0)
+
+    def test_session_get_many_concurrently(self) -> None:
+        engine = self.pooled_engine()
+        with DBSession(engine) as sess:
+            with mock.patch("EnORM.query.in_chunk_size", return_value=2):
+                found = sess.query(Human).get_many([34, 99, 17, 5], concurrency=2)
+            self.assertListEqual([rec.id for rec in found], [34, 17])
+            self.assertListEqual(found.missing, [99, 5])
+            self.assertListEqual(sess.conn.executions, [])
+            self.assertEqual(engine.connection_pool.in_use, 1)
+            self.assertIs(sess.identity_map.get(Human, 17), found[1])
+
+            with mock.patch("EnORM.query.ThreadPoolExecutor") as executor:
+                self.assertListEqual(sess.query(Human).get_many([17, 34], concurrency=2).lst, [found[1], found[0]])
+            executor.assert_not_called()
+
+    def test_session_gather(self) -> None:
+        engine = self.pooled_engine()
+        with DBSession(engine) as sess:
+            humans, adults = sess.gather(sess.query(Human), sess.query(Human).filter(Human.age > 18))
+            self.assertListEqual([rec.id for rec in humans], [17, 34])
+            self.assertIs(adults[0], humans[0])
+            self.assertListEqual(sess.conn.executions, [])
+            self.assertEqual(engine.connection_pool.in_use, 1)
+
+            def execute(cursor: Any, sql: str, *params: Any) -> None:
+                if "pets" in sql:
+                    raise pyodbc.DatabaseError
+                cursor.connection.executions.append([sql, *params])
+                cursor.description = (("id", "col"), ("full_name", "col"), ("age", "col"))
+
+            with mock.patch.object(FakeCursor, "execute", execute):
+                with self.assertRaises(QueryFormatError):
+                    sess.gather(sess.query(Human), sess.query(Pet), max_workers=2)
+            self.assertEqual(engine.connection_pool.in_use, 1)
+
+            update = sess.query(Human)
+            update.update(age=31)
+            with self.assertRaises(MethodChainingError):
+                sess.gather(sess.query(Human), update)
+            with self.assertRaises(ValueError):
+                sess.gather(sess.query(Human), max_workers=0)
+
+    def test_session_failed_commit(self) -> None:
+        engine = self.pooled_engine()
+        sess = DBSession(engine)
+        conn = sess.conn
+        sess.add(Pet(name="Sakura", age=5))
+        with mock.patch.object(FakeConnection, "commit", side_effect=pyodbc.Error):
+            with self.assertRaises(pyodbc.Error):
+                sess.close()
+        self.assertIs(AbstractEngine.active_session.get(), self.sess2)
+        with DBSession(engine) as other:
+            self.assertIs(other.conn, conn)
+            self.assertListEqual(other.conn.executions, [])
+
+        sess = DBSession(engine)
+        with mock.patch.object(FakeConnection, "commit", side_effect=pyodbc.Error):
+            with mock.patch.object(FakeConnection, "rollback", side_effect=pyodbc.Error):
+                with self.assertRaises(pyodbc.Error):
+                    sess.close()
+        self.assertFalse(conn.open)
+        self.assertEqual(engine.connection_pool.size, 0)
+
+    def test_session_invalidates_disconnected_connection(self) -> None:
+        engine = self.pooled_engine()
+        with self.assertRaises(pyodbc.OperationalError):
+            with DBSession(engine) as sess:
+                conn = sess.conn
+                raise pyodbc.OperationalError
+        self.assertFalse(conn.open)
+        self.assertEqual(engine.connection_pool.size, 0)
+
+        with self.assertRaises(pyodbc.InterfaceError):
+            with engine.parallel_cursor(None) as cursor:
+                conn = cursor.connection
+                raise pyodbc.InterfaceError
+        self.assertFalse(conn.open)
+        self.assertEqual(engine.connection_pool.size, 0)
+
+    def test_session_failed_start(self) -> None:
+        engine = self.pooled_engine()
+        with mock.patch("EnORM.db_session.SchemaManager.create_pending_tables", side_effect=pyodbc.Error):
+            with self.assertRaises(pyodbc.Error):
+                DBSession(engine)
+        self.assertEqual(engine.connection_pool.in_use, 0)
+        self.assertIs(AbstractEngine.active_session.get(), self.sess2)
+
+    def test_session_unit_of_work(self) -> None:
+        with DBSession(self.pooled_engine()) as sess:
+            jacques, _ = sess.query(Human).all()
+            sess.delete(jacques)
+            sess.query(Human).filter(Human.age == 30).update(age=31)
+            pet = Pet(name="Sakura", age=5)
+            sess.add(pet)
+            with mock.patch.object(sess.cursor, "executemany") as executemany:
+                with mock.patch.object(sess.cursor, "execute") as execute:
+                    sess.save()
+            self.assertListEqual(
+                executemany.call_args_list,
+                [mock.call(pet.sql, [("Sakura", 5)]), mock.call("DELETE FROM humans WHERE id = ?;", [(17,)])],
+            )
+            execute.assert_called_once_with("UPDATE humans SET humans.age = ? WHERE humans.age = ?", 31, 30)
+            self.assertIsNotNone(sess.last_write_at)
+            self.assertIsNone(sess.identity_map.get(Human, 17))
+
+            with self.assertRaises(EntityError):
+                sess.delete(sess.query(Human.id).all()[0])
+
+    def test_session_dirty_records(self) -> None:
+        with DBSession(self.pooled_engine()) as sess:
+            jacques, joanna = sess.query(Human).all()
+            jacques.age += 1
+            jacques.full_name = "Jacques Trate Jr."
+            jacques.age += 1
+            joanna.age = 41
+            joanna.full_name = "Joanna Males"
+            self.assertDictEqual(jacques.dirty, {"age": 32, "full_name": "Jacques Trate Jr."})
+            with mock.patch.object(sess.cursor, "executemany") as executemany:
+                sess.save()
+            executemany.assert_called_once_with(
+                "UPDATE humans SET age = ?, full_name = ? WHERE id = ?;",
+                [(32, "Jacques Trate Jr.", 17), (41, "Joanna Males", 34)],
+            )
+            self.assertDictEqual(jacques.dirty, {})
+            self.assertDictEqual(sess.unit_of_work.dirty, {})
+
     def test_session_query(self) -> None:
         q = self.sess2.query(Order, Order.country).filter(Order.id == 12)
         self.assertIsInstance(q, Query)
-        self.assertEqual(str(q), "SELECT orders.country FROM orders WHERE orders.id = 12")
+        self.assertEqual(str(q), "SELECT orders.country FROM orders WHERE orders.id = ?")
         self.assertListEqual(self.sess2.query_executor.accumulator, [q])
 
     def test_session_save(self) -> None:
         self.sess2.save()
-        self.assertListEqual(self.sess2.engine.conn.executions, [])
+        self.assertListEqual(self.sess2.conn.executions, [])
         self.assertListEqual(self.sess2.query_executor.accumulator, [])
@@ -0,0 +1,149 @@
+import unittest
+from unittest import mock
+
+from EnORM import Serial
+from EnORM.exceptions import EntityError
+from EnORM.sharding import ShardedDBEngine, ShardedDBSession
+
+from .defs import MYSQL_CONN_STR, POSTGRESQL_CONN_STR, FakeConnection, FakeCursor, Human, Pet, patch_pool_connect
+
+SHARDS = {"eu": POSTGRESQL_CONN_STR + "?shard=eu", "us": POSTGRESQL_CONN_STR + "?shard=us"}
+
+
+class TestSharding(unittest.TestCase):
+    def setUp(self) -> None:
+        patch_pool_connect(self)
+        self.engine = ShardedDBEngine(SHARDS, pool_size=2)
+        self.addCleanup(self.engine.dispose)
+        self.engine.shard_by(Human, "gender", lambda gender: "eu" if gender == "F" else "us")
+        Human.alias = None
+        Human.full_name.alias = None
+        Human.age.alias = None
+
+    def test_sharded_engine_init(self) -> None:
+        self.assertEqual(self.engine.dialect, "postgresql")
+        with self.assertRaises(ValueError):
+            _ = ShardedDBEngine({"a": POSTGRESQL_CONN_STR, "b": MYSQL_CONN_STR}, pool_size=1)
+        with self.assertRaises(EntityError):
+            self.engine.shard_by(Pet, "tenant_id", lambda _: "eu")
+
+    def test_sharded_engine_dispose(self) -> None:
+        self.assertEqual(self.engine.executor._max_workers, 2)
+        with ShardedDBSession(self.engine) as session:
+            session.query(Human).all()
+            conns = [shard.conn for shard in session.shard_sessions.values()]
+        self.engine.dispose()
+        self.assertFalse(any(conn.open for conn in conns))
+        self.assertTrue(all(engine.connection_pool.closed.is_set() for engine in self.engine.engines.values()))
+        with self.assertRaises(RuntimeError):
+            self.engine.executor.submit(print)
+
+    def test_sharded_add(self) -> None:
+        with ShardedDBSession(self.engine) as session:
+            session.add(Human(id=Serial(7), full_name="Joanna Males", gender="F"))
+            with self.assertRaises(EntityError):
+                session.add(Pet(name="Sakura", age=5))
+            self.assertListEqual(list(session.shard_sessions), ["eu"])
+            self.assertEqual(len(list(session)), 1)
+
+    def test_sharded_query_routed_by_shard_key(self) -> None:
+        with ShardedDBSession(self.engine) as session:
+            res = session.query(Human).filter_by(gender="M").all()
+            self.assertEqual(len(res), 2)
+            self.assertListEqual(list(session.shard_sessions), ["us"])
+
+    def test_sharded_query_scatter_gather(self) -> None:
+        with ShardedDBSession(self.engine) as session:
+            res = session.query(Human, Human.id, Human.full_name, Human.age).order_by(Human.id).slice(1, 4).all()
+            self.assertListEqual([rec.id for rec in res], [17, 34, 34])
+            self.assertListEqual(sorted(session.shard_sessions), ["eu", "us"])
+            self.assertEqual(
+                session.shard_sessions["eu"].conn.executions[-1][0],
+                "SELECT humans.id, humans.full_name, humans.age FROM humans ORDER BY humans.id LIMIT 4",
+            )
+
+    def test_sharded_record_assignment(self) -> None:
+        with ShardedDBSession(self.engine) as session:
+            rec = session.query(Human).filter_by(gender="M").first()
+            rec.age = 99
+            with mock.patch.object(FakeConnection, "commit"):
+                session.save()
+            sql, *params = session.shard_sessions["us"].conn.executions[-1]
+            self.assertTrue(sql.startswith("UPDATE humans SET humans.age = ? WHERE humans.gender = ?"))
+            self.assertListEqual(params[:2], [99, "M"])
+
+    def test_sharded_save_runs_writes_only(self) -> None:
+        with ShardedDBSession(self.engine) as session:
+            session.query(Human).filter_by(gender="M").all()
+            session.query(Human).filter_by(gender="F").delete()
+            with mock.patch.object(FakeConnection, "commit"):
+                session.save()
+            us = [sql for sql, *_ in session.shard_sessions["us"].conn.executions]
+            eu = [sql for sql, *_ in session.shard_sessions["eu"].conn.executions]
+            self.assertEqual(len(us), 1)
+            self.assertTrue(us[0].startswith("SELECT"))
+            self.assertListEqual(eu, ["DELETE FROM humans WHERE humans.gender = ?"])
+            self.assertIsNotNone(session.last_write_at)
+
+    def test_sharded_paginate_by(self) -> None:
+        shard_rows = [
+            [(40, "Joanna Males", 30), (10, "Jacques Trate", 30)],
+            [(30, "Jean Bon", 30), (20, "Guy Tar", 30)],
+        ]
+        with ShardedDBSession(self.engine) as session:
+            with mock.patch.object(FakeCursor, "fetchall", side_effect=shard_rows):
+                q = session.query(Human, Human.id, Human.full_name, Human.age)
+                page = q.paginate_by(Human.id, page_size=2, descending=True)
+            self.assertListEqual([rec.id for rec in page], [40, 30])
+
+        shard_rows = [
+            [(30, "Joanna Males", 31), (10, "Jacques Trate", 30)],
+            [(40, "Jean Bon", 31), (20, "Guy Tar", 29)],
+        ]
+        with ShardedDBSession(self.engine) as session:
+            with mock.patch.object(FakeCursor, "fetchall", side_effect=shard_rows):
+                q = session.query(Human, Human.id, Human.full_name, Human.age)
+                page = q.paginate_by(Human.age, Human.id, page_size=3, descending=True)
+            self.assertListEqual([rec.id for rec in page], [40, 30, 10])
+
+    def test_sharded_merge_mixed_directions(self) -> None:
+        shard_rows = [[(10, "Joanna Males", 31), (30, "Jacques Trate", 30)], [(20, "Jean Bon", 31), (5, "Guy Tar", 30)]]
+        with ShardedDBSession(self.engine) as session:
+            with mock.patch.object(FakeCursor, "fetchall", side_effect=shard_rows):
+                q = session.query(Human, Human.id, Human.full_name, Human.age)
+                res = q.order_by("humans, age DESC", Human.id).all()
+            self.assertListEqual([rec.id for rec in res], [10, 20, 5, 30])
+
+    def test_sharded_exit_runs_pending_writes(self) -> None:
+        with mock.patch.object(FakeConnection, "commit"):
+            with ShardedDBSession(self.engine) as session:
+                session.query(Human).filter_by(gender="F").delete()
+        self.assertListEqual(list(session.shard_sessions), ["eu"])
+        conn = self.engine.engines["eu"].connection_pool.pool.get_nowait()
+        self.assertListEqual(conn.executions, [["DELETE FROM humans WHERE humans.gender = ?", "F"]])
+
+    def test_sharded_metrics_labels(self) -> None:
+        engine = ShardedDBEngine(SHARDS, pool_size=1, metrics_labels={"app": "billing"})
+        self.addCleanup(engine.dispose)
+        self.assertEqual(engine.engines["eu"].metrics.labels, (("app", "billing"), ("shard", "eu")))
+        self.assertEqual(engine.metrics.labels, (("app", "billing"),))
+
+    def test_sharded_query_streaming(self) -> None:
+        with ShardedDBSession(self.engine) as session:
+            q = session.query(Human, Human.id, Human.full_name, Human.age).order_by(Human.id).slice(1, 4)
+            self.assertListEqual([rec.id for rec in q.iter(batch_size=1)], [17, 34, 34])
+
+    def test_sharded_count(self) -> None:
+        with ShardedDBSession(self.engine) as session:
+            with mock.patch.object(FakeCursor, "fetchall", return_value=[(3,)]):
+                self.assertEqual(session.query(Human).count(), 6)
+                self.assertEqual(session.query(Human).filter_by(gender="F").count(), 3)
+                self.assertEqual(session.query(Human).offset(4).count(), 2)
+                self.assertTrue(session.query(Human).exists())
+
+    def test_sharded_metrics(self) -> None:
+        with ShardedDBSession(self.engine) as session:
+            session.query(Human).all()
+        gauges = self.engine.metrics.snapshot()["gauges"]
+        self.assertEqual(gauges[("enorm_pool_connections_idle", (("shard", "eu"),))], 1)
+        self.assertEqual(gauges[("enorm_pool_connections_idle", (("shard", "us"),))], 1)
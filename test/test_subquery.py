@@ -25,7 +25,8 @@ class TestSubquery(unittest.TestCase):
             _ = sq.id
 
     def test_subquery_sql(self) -> None:
-        self.assertEqual(sq.inner_sql, "SELECT humans.full_name, humans.age FROM humans WHERE humans.age >= 30")
+        self.assertEqual(sq.inner_sql, "SELECT humans.full_name, humans.age FROM humans WHERE humans.age >= ?")
         self.assertEqual(
-            sq.full_sql, "(SELECT humans.full_name, humans.age FROM humans WHERE humans.age >= 30) AS %s" % sq.view_name
+            sq.full_sql, "(SELECT humans.full_name, humans.age FROM humans WHERE humans.age >= ?) AS %s" % sq.view_name
         )
+        self.assertTupleEqual(sq.params, (30,))